@@ -22,6 +22,19 @@ class FirestoreNewsRepositoryImpl implements FirestoreNewsRepository {
     apiKey: apiKeyGemini,
   );
 
+  // Must match SOURCES_COLLECTION in python/storage.py, which writes the
+  // source fields compact (schema_version 2) articles leave out.
+  static const String _sourcesCollectionName = "sources";
+  static const List<String> _sourceFields = [
+    "source_name",
+    "source_url",
+    "source_icon",
+    "creator",
+    "language",
+    "country",
+  ];
+  Map<String, Map<String, dynamic>>? _sources;
+
   @override
   Future<NewsDataModel> fetchTrendingNews() async {
     try {
@@ -48,6 +61,7 @@ class FirestoreNewsRepositoryImpl implements FirestoreNewsRepository {
 
       final querySnapshot =
           await _firestore.collection(articlesCollectionName).limit(100).get();
+      await _loadSources();
 
       if (querySnapshot.docs.isEmpty) {
         log("No articles found in Firestore collection");
@@ -255,8 +269,34 @@ Yêu cầu:
     return Ai.ONLY_AVAILABLE_IN_CORPORATE_PLANS;
   }
 
+  /// Loads the source documents that compact articles refer to, once.
+  Future<void> _loadSources() async {
+    if (_sources != null) return;
+    try {
+      final snapshot =
+          await _firestore.collection(_sourcesCollectionName).get();
+      _sources = {for (final doc in snapshot.docs) doc.id: doc.data()};
+    } catch (e) {
+      log("Error loading sources from Firestore: $e");
+    }
+  }
+
+  /// Fills in the fields a compact (schema_version 2) article leaves out:
+  /// its source's constants, and content when it equals the description.
+  Map<String, dynamic> _expandCompactDocument(Map<String, dynamic> data) {
+    final version = data['schema_version'];
+    if (version is! num || version < 2) return data;
+
+    final source = _sources?[data['source_id']] ?? const <String, dynamic>{};
+    return {
+      for (final field in _sourceFields) field: source[field],
+      ...data,
+      'content': data['content'] ?? data['description'],
+    };
+  }
+
   Result _mapDocumentToResult(QueryDocumentSnapshot<Map<String, dynamic>> doc) {
-    final data = doc.data();
+    final data = _expandCompactDocument(doc.data());
 
     DateTime? pubDate;
     if (data['pubDate'] != null) {
@@ -327,6 +367,7 @@ Yêu cầu:
               .where('category', isEqualTo: category)
               .limit(50)
               .get();
+      await _loadSources();
 
       if (querySnapshot.docs.isEmpty) {
         log("No articles found for category '$category' in Firestore");
@@ -0,0 +1,330 @@
+import os
+import time
+import heapq
+import logging
+import itertools
+import threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from metrics import CATEGORY_POLL_INTERVAL, CATEGORY_POLLS
+from rate_limit import TokenBucket
+
+# "fixed" fetches every category each FETCH_INTERVAL_MINUTES; "adaptive" polls
+# each (source, category) about as often as it publishes.
+SCHEDULER_MODE = os.getenv("SCHEDULER_MODE", "fixed").lower()
+# Bounds of a category's polling interval. Idle categories back off to the
+# upper bound, so it may exceed the fixed interval.
+ADAPTIVE_MIN_INTERVAL_MINUTES = float(os.getenv("ADAPTIVE_MIN_INTERVAL_MINUTES", "5"))
+ADAPTIVE_MAX_INTERVAL_MINUTES = float(
+    os.getenv("ADAPTIVE_MAX_INTERVAL_MINUTES", "1440")
+)
+# New articles a poll should find on average; busier categories are polled sooner.
+ADAPTIVE_TARGET_NEW_PER_POLL = float(os.getenv("ADAPTIVE_TARGET_NEW_PER_POLL", "5"))
+# Weight of the latest poll in the smoothed publish rate.
+ADAPTIVE_RATE_SMOOTHING = float(os.getenv("ADAPTIVE_RATE_SMOOTHING", "0.3"))
+# Interval multiplier after a poll that found nothing new or failed.
+ADAPTIVE_BACKOFF_FACTOR = float(os.getenv("ADAPTIVE_BACKOFF_FACTOR", "2"))
+# Category polls allowed per hour across all sources. The bucket holds one
+# full sweep, so the first poll of every category is never held back.
+ADAPTIVE_POLLS_PER_HOUR = float(os.getenv("ADAPTIVE_POLLS_PER_HOUR", "60"))
+
+# Delay before a category is retried while its fetcher is still busy.
+BUSY_RETRY_SECONDS = 30
+
+CategoryKey = Tuple[str, str]
+
+
+class CategoryState:
+    """What the planner knows about one (source, category)."""
+
+    __slots__ = (
+        "rate",
+        "interval",
+        "due_at",
+        "last_polled",
+        "polls",
+        "empty_polls",
+        "new_articles",
+    )
+
+    def __init__(self, interval: float, due_at: float):
+        # Smoothed new articles per hour; None until a poll could measure it.
+        self.rate: Optional[float] = None
+        self.interval = interval
+        # None while the category is being polled.
+        self.due_at: Optional[float] = due_at
+        self.last_polled: Optional[float] = None
+        self.polls = 0
+        self.empty_polls = 0
+        self.new_articles = 0
+
+
+class PollPlanner:
+    """Decides when each (source, category) is polled next.
+
+    Every poll reports how many articles it found that were not stored yet
+    (see BaseFetcher.record_category). Dividing that by the time since the
+    previous poll gives the category's publish rate, smoothed
+    with an EWMA, and the next poll is timed to find about `target` new
+    articles. A poll that finds nothing multiplies the interval by `backoff`
+    instead. Due times live in a heap; entries superseded by a later record()
+    or defer() are dropped when they surface.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = ADAPTIVE_MIN_INTERVAL_MINUTES * 60,
+        max_interval: float = ADAPTIVE_MAX_INTERVAL_MINUTES * 60,
+        target: float = ADAPTIVE_TARGET_NEW_PER_POLL,
+        smoothing: float = ADAPTIVE_RATE_SMOOTHING,
+        backoff: float = ADAPTIVE_BACKOFF_FACTOR,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.target = target
+        self.smoothing = smoothing
+        self.backoff = backoff
+        self._states: Dict[CategoryKey, CategoryState] = {}
+        self._heap: List[Tuple[float, int, CategoryKey]] = []
+        self._order = itertools.count()
+        self._lock = threading.Lock()
+
+    def __contains__(self, key: CategoryKey) -> bool:
+        return key in self._states
+
+    def _push(self, key: CategoryKey, due_at: float):
+        self._states[key].due_at = due_at
+        heapq.heappush(self._heap, (due_at, next(self._order), key))
+
+    def _clamp(self, interval: float) -> float:
+        return min(self.max_interval, max(self.min_interval, interval))
+
+    def add(self, key: CategoryKey, now: float):
+        """Starts tracking a category; its first poll is due right away."""
+        with self._lock:
+            if key not in self._states:
+                self._states[key] = CategoryState(self.min_interval, now)
+                self._push(key, now)
+
+    def pop_due(self, now: float) -> List[CategoryKey]:
+        """Takes every category due by `now`, the most overdue first."""
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                due_at, _, key = heapq.heappop(self._heap)
+                state = self._states[key]
+                if state.due_at != due_at:
+                    continue
+                state.due_at = None
+                due.append(key)
+        return due
+
+    def next_due(self) -> Optional[float]:
+        with self._lock:
+            while self._heap:
+                due_at, _, key = self._heap[0]
+                if self._states[key].due_at == due_at:
+                    return due_at
+                heapq.heappop(self._heap)
+        return None
+
+    def defer(self, key: CategoryKey, due_at: float):
+        """Puts a popped category back without counting a poll."""
+        with self._lock:
+            self._push(key, due_at)
+
+    def record(
+        self,
+        key: CategoryKey,
+        new: int,
+        ok: bool,
+        now: float,
+        oldest: Optional[datetime] = None,
+        newest: Optional[datetime] = None,
+    ) -> float:
+        """Updates a category from one poll and returns its next interval."""
+        with self._lock:
+            state = self._states[key]
+            state.polls += 1
+            if ok:
+                if state.last_polled is not None:
+                    window = now - state.last_polled
+                elif oldest is not None and newest is not None:
+                    # First poll: the backlog's publication times show the pace.
+                    window = (newest - oldest).total_seconds()
+                else:
+                    window = 0
+                if window > 0:
+                    observed = new * 3600 / window
+                    state.rate = (
+                        observed
+                        if state.rate is None
+                        else self.smoothing * observed
+                        + (1 - self.smoothing) * state.rate
+                    )
+                state.last_polled = now
+                state.new_articles += new
+
+            if ok and new > 0:
+                if state.rate:
+                    state.interval = self._clamp(self.target * 3600 / state.rate)
+            else:
+                state.empty_polls += 1
+                state.interval = self._clamp(state.interval * self.backoff)
+            self._push(key, now + state.interval)
+            return state.interval
+
+    def snapshot(self, now: float) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "source": source,
+                    "category": category,
+                    "rate_per_hour": (
+                        round(state.rate, 2) if state.rate is not None else None
+                    ),
+                    "interval_minutes": round(state.interval / 60, 1),
+                    "next_poll_in_seconds": (
+                        max(0, round(state.due_at - now))
+                        if state.due_at is not None
+                        else None
+                    ),
+                    "polls": state.polls,
+                    "empty_polls": state.empty_polls,
+                    "new_articles": state.new_articles,
+                }
+                for (source, category), state in sorted(self._states.items())
+            ]
+
+
+class AdaptiveScheduler:
+    """Runs fetchers for just the categories the planner finds due.
+
+    A global token bucket caps category polls per hour; due categories it
+    cannot pay for wait for the next token. Categories of one source that
+    come due together are fetched in one run, and a source is never run
+    twice at once.
+    """
+
+    def __init__(
+        self,
+        fetchers: Callable[[], List[Tuple[Any, str]]],
+        run_fetcher: Callable[[Any, str, List[str]], Any],
+        max_workers: int,
+        planner: Optional[PollPlanner] = None,
+        polls_per_hour: float = ADAPTIVE_POLLS_PER_HOUR,
+    ):
+        self._list_fetchers = fetchers
+        self._run_fetcher = run_fetcher
+        self.planner = planner or PollPlanner()
+        self.polls_per_hour = polls_per_hour
+        self.budget: Optional[TokenBucket] = None
+        self._fetchers: Dict[str, Tuple[Any, str]] = {}
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+        self._next_discovery = 0.0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, max_workers), thread_name_prefix="poll"
+        )
+
+    def _discover(self, now: float):
+        """Adds the categories of fetchers built since the last look."""
+        if now < self._next_discovery:
+            return
+        # Fetchers that failed to build are retried on this cadence.
+        self._next_discovery = now + self.planner.min_interval
+        for fetcher, label in self._list_fetchers():
+            if fetcher.source_id in self._fetchers:
+                continue
+            self._fetchers[fetcher.source_id] = (fetcher, label)
+            for category in fetcher.category_keys():
+                self.planner.add((fetcher.source_id, category), now)
+            logging.info(
+                f"Adaptive scheduling {len(fetcher.category_keys())} categories "
+                f"of {label}."
+            )
+        categories = sum(len(f.category_keys()) for f, _ in self._fetchers.values())
+        if self.budget is None:
+            self.budget = TokenBucket(
+                self.polls_per_hour / 3600, capacity=max(1, categories)
+            )
+        else:
+            self.budget.set_rate(self.budget.rate, capacity=max(1, categories))
+
+    def run_pending(self, now: Optional[float] = None):
+        now = now if now is not None else time.time()
+        self._discover(now)
+        batches: Dict[str, List[str]] = defaultdict(list)
+        for key in self.planner.pop_due(now):
+            source, category = key
+            with self._lock:
+                busy = source in self._running
+            if busy:
+                self.planner.defer(key, now + BUSY_RETRY_SECONDS)
+                continue
+            wait = self.budget.try_acquire()
+            if wait > 0:
+                self.planner.defer(key, now + wait)
+                continue
+            batches[source].append(category)
+
+        for source, categories in batches.items():
+            with self._lock:
+                self._running.add(source)
+            self._executor.submit(self._poll, source, categories)
+
+    def _poll(self, source: str, categories: List[str]):
+        fetcher, label = self._fetchers[source]
+        started = time.time()
+        try:
+            self._run_fetcher(fetcher, label, categories)
+        except Exception as e:
+            logging.error(f"Polling {label} failed: {e}", exc_info=True)
+        finally:
+            results = dict(fetcher.category_results)
+            # A grouped query may have polled more categories than were due.
+            for category in set(categories) | set(results):
+                result = results.get(category)
+                if (source, category) not in self.planner:
+                    continue
+                if result is None:
+                    # Never reached, e.g. after a stop: try again as if it failed.
+                    result = {"new": 0, "ok": False, "oldest": None, "newest": None}
+                interval = self.planner.record(
+                    (source, category),
+                    result["new"],
+                    result["ok"],
+                    started,
+                    result["oldest"],
+                    result["newest"],
+                )
+                if not result["ok"]:
+                    outcome = "failed"
+                else:
+                    outcome = "new" if result["new"] > 0 else "empty"
+                CATEGORY_POLLS.inc(source=source, outcome=outcome)
+                CATEGORY_POLL_INTERVAL.set(interval, source=source, category=category)
+            with self._lock:
+                self._running.discard(source)
+
+    def run_forever(self):
+        logging.info(
+            f"Adaptive scheduler started: intervals between "
+            f"{self.planner.min_interval / 60:.0f} and "
+            f"{self.planner.max_interval / 60:.0f} minutes, "
+            f"{self.polls_per_hour:.0f} category polls per hour."
+        )
+        while True:
+            try:
+                self.run_pending()
+            except Exception as e:
+                logging.error(f"Scheduler error: {e}", exc_info=True)
+            next_due = self.planner.next_due()
+            delay = 60.0 if next_due is None else next_due - time.time()
+            time.sleep(min(60.0, max(1.0, delay)))
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        return self.planner.snapshot(time.time())
@@ -1,12 +1,49 @@
 import os
 import sys
-import time
+import asyncio
 import logging
-from datetime import datetime
-from typing import List, Dict, Any
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import List, Dict, Any, Optional, Set, Tuple
 
-from newsdataapi import NewsDataApiClient
+from article import Article
 from base_fetcher import BaseFetcher
+from pipeline import ArticleWriter
+from rate_limit import AdaptiveTokenBucket
+
+# "async" requests categories concurrently under the plan's rate limit;
+# "sequential" requests them one after another under the same limit.
+API_FETCH_MODE = os.getenv("API_FETCH_MODE", "async")
+# NewsData.io plan rate limit, e.g. 30 requests per 15 minutes on the free plan.
+NEWSDATA_REQUESTS_PER_WINDOW = int(os.getenv("NEWSDATA_REQUESTS_PER_WINDOW", "30"))
+NEWSDATA_WINDOW_SECONDS = float(os.getenv("NEWSDATA_WINDOW_SECONDS", "900"))
+NEWSDATA_MAX_CONCURRENCY = int(os.getenv("NEWSDATA_MAX_CONCURRENCY", "4"))
+NEWSDATA_MAX_RETRIES = int(os.getenv("NEWSDATA_MAX_RETRIES", "3"))
+# Pages followed per category through the nextPage cursor. Every page costs
+# one API credit; paging stops earlier once a page holds a stored article.
+NEWSDATA_MAX_PAGES = int(os.getenv("NEWSDATA_MAX_PAGES", "3"))
+# Categories sent as one comma-separated `category` parameter. NewsData.io
+# accepts up to 5 per request; 1 restores one request per category.
+NEWSDATA_CATEGORIES_PER_QUERY = int(os.getenv("NEWSDATA_CATEGORIES_PER_QUERY", "5"))
+
+
+def plan_queries(categories: List[str], per_query: int) -> List[List[str]]:
+    """Groups categories into the fewest requests of at most per_query each."""
+    per_query = max(1, per_query)
+    return [categories[i : i + per_query] for i in range(0, len(categories), per_query)]
+
+
+class NewsDataResponseError(Exception):
+    """news_api returned a response whose status is not "success"."""
+
+    def __init__(self, response: Dict[str, Any]):
+        super().__init__(f"Unexpected response: {response}")
+        self.response_body = response
+
+
+class QuotaExhaustedError(Exception):
+    """The plan's credits are used up; no request can succeed this cycle."""
 
 
 class APIFetcher(BaseFetcher):
@@ -34,7 +71,31 @@ class APIFetcher(BaseFetcher):
     def __init__(self):
         super().__init__(source_id="newsdata_api")
         self._load_api_key()
+        # Imported here so that loading this module stays cheap.
+        from newsdataapi import NewsDataApiClient
+
         self.api_client = NewsDataApiClient(apikey=self.api_key)
+        self.fetch_mode = API_FETCH_MODE
+        self.max_concurrency = max(1, NEWSDATA_MAX_CONCURRENCY)
+        self.max_pages = max(1, NEWSDATA_MAX_PAGES)
+        self.queries = plan_queries(self.CATEGORIES, NEWSDATA_CATEGORIES_PER_QUERY)
+        self._submitted_ids: Set[str] = set()
+        # (article_id, published) of the articles filed under each category.
+        self._listed_by_category: Dict[str, List[Tuple[str, Optional[datetime]]]] = (
+            defaultdict(list)
+        )
+        self._submitted_lock = threading.Lock()
+        self.rate_limiter = AdaptiveTokenBucket(
+            NEWSDATA_REQUESTS_PER_WINDOW / NEWSDATA_WINDOW_SECONDS,
+            capacity=NEWSDATA_REQUESTS_PER_WINDOW,
+        )
+        self._quota_exhausted = False
+
+    def reset(self):
+        super().reset()
+        self._quota_exhausted = False
+        self._submitted_ids.clear()
+        self._listed_by_category.clear()
 
     def _load_api_key(self):
         self.api_key = os.getenv("NEWS_API_KEY")
@@ -42,83 +103,322 @@ class APIFetcher(BaseFetcher):
             raise ValueError("NEWS_API_KEY environment variable is required.")
         logging.info("NewsData.io API key loaded.")
 
-    def _process_article(self, article: Dict[str, Any]) -> Dict[str, Any]:
+    def _process_article(self, article: Dict[str, Any]) -> Article:
         now = datetime.now().isoformat()
         article_id = article.get("article_id")
 
         if not article_id:
             article_id = self._generate_article_id(article.get("link"))
 
-        return {
-            "article_id": article_id,
-            "title": article.get("title"),
-            "link": article.get("link"),
-            "creator": article.get("creator", []),
-            "video_url": article.get("video_url"),
-            "description": article.get("description"),
-            "content": article.get("description"),
-            "pubDate": article.get("pubDate"),
-            "image_url": article.get("image_url"),
-            "source_id": article.get("source_id"),
-            "source_priority": article.get("source_priority"),
-            "language": article.get("language"),
-            "country": article.get("country", []),
-            "category": article.get("category", []),
-            "ai_tag": "API_FETCHED",
-            "created_at": now,
-            "updated_at": now,
-        }
-
-    def fetch_category_news(self, category: str) -> List[Dict[str, Any]]:
-        logging.info(f"Fetching news for category: '{category.upper()}'")
-        processed_articles = []
+        return Article(
+            article_id=article_id,
+            title=article.get("title"),
+            link=article.get("link"),
+            creator=article.get("creator", []),
+            video_url=article.get("video_url"),
+            description=article.get("description"),
+            content=article.get("description"),
+            pubDate=article.get("pubDate"),
+            image_url=article.get("image_url"),
+            source_id=article.get("source_id"),
+            source_priority=article.get("source_priority"),
+            language=article.get("language"),
+            country=article.get("country", []),
+            category=article.get("category", []),
+            ai_tag="API_FETCHED",
+            created_at=now,
+            updated_at=now,
+        )
+
+    @staticmethod
+    def _throttle_reason(error: Exception) -> Optional[str]:
+        """Returns "quota", "rate" or None for a failed news_api call."""
+        text = str(getattr(error, "response_body", None) or error).lower()
+        if any(word in text for word in ("quota", "credit", "daily limit")):
+            return "quota"
+        if (
+            getattr(error, "status_code", None) == 429
+            or "ratelimit" in text
+            or "too many requests" in text
+        ):
+            return "rate"
+        return None
+
+    def _request_page(self, query: str, page: Optional[str]) -> Dict[str, Any]:
+        params = {"language": "en", "category": query}
+        if page:
+            params["page"] = page
+        response = self.api_client.news_api(**params)
+        if response.get("status") != "success":
+            raise NewsDataResponseError(response)
+        return response
+
+    def _on_api_error(self, query: str, error: Exception, attempt: int):
+        """Backs off after a 429, or re-raises when the error is final."""
+        reason = self._throttle_reason(error)
+        if reason == "quota":
+            self._quota_exhausted = True
+            raise QuotaExhaustedError(str(error)) from error
+        if reason != "rate" or attempt >= NEWSDATA_MAX_RETRIES:
+            raise error
+        delay = self.rate_limiter.throttled(getattr(error, "retry_after", None))
+        logging.warning(
+            f"Rate limited on '{query}', retrying in {delay:.1f}s "
+            f"at {self.rate_limiter.rate * 60:.2f} requests/min."
+        )
+
+    def _process_response(
+        self, query: str, response: Dict[str, Any]
+    ) -> List[Dict[str, Any]]:
+        results = response.get("results", [])
+        if not results:
+            logging.info(f"No articles found for '{query}'.")
+            return []
+
+        logging.info(f"Received {len(results)} articles for '{query}'.")
+        return [self._process_article(article) for article in results]
+
+    @staticmethod
+    def _published_at(article: Dict[str, Any]) -> Optional[datetime]:
         try:
-            response = self.api_client.news_api(
-                language="en", category=category
+            # NewsData.io reports pubDate in UTC as "2025-06-22 15:07:14".
+            published = datetime.strptime(article.get("pubDate"), "%Y-%m-%d %H:%M:%S")
+        except (TypeError, ValueError):
+            return None
+        return published.replace(tzinfo=timezone.utc)
+
+    def _apply_watermark(
+        self, query: str, articles: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], bool]:
+        """Drops articles the query's watermark covers and stages the rest.
+
+        Returns the new articles and whether the page reached the watermark,
+        in which case later pages only hold older articles.
+        """
+        new_articles = []
+        reached = False
+        for article in articles:
+            published = self._published_at(article)
+            if self.watermarks.is_older(query, published):
+                reached = True
+                continue
+            if self.watermarks.seen(query, article["article_id"]):
+                continue
+            self.watermarks.observe(query, article["article_id"], published)
+            new_articles.append(article)
+        if reached or len(new_articles) < len(articles):
+            logging.info(
+                f"Watermark of '{query}' covers "
+                f"{len(articles) - len(new_articles)} of {len(articles)} articles."
             )
+        return new_articles, reached
 
-            if response.get("status") != "success":
-                logging.error(
-                    f"Failed to fetch category '{category}'. Response: {response}"
-                )
-                return []
+    def _acquire_token(self) -> bool:
+        while not self.should_stop():
+            wait = self.rate_limiter.try_acquire()
+            if wait <= 0:
+                return True
+            self._sleep(min(wait, 1.0))
+        return False
+
+    async def _acquire_token_async(self) -> bool:
+        while not self.should_stop():
+            wait = self.rate_limiter.try_acquire()
+            if wait <= 0:
+                return True
+            await asyncio.sleep(min(wait, 1.0))
+        return False
+
+    def _fetch_page(self, query: str, page: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Requests one page under the rate limit; None if stopped or out of quota."""
+        for attempt in range(NEWSDATA_MAX_RETRIES + 1):
+            if self._quota_exhausted or not self._acquire_token():
+                return None
+            try:
+                with self.category_timer(query):
+                    response = self._request_page(query, page)
+            except Exception as e:
+                self._on_api_error(query, e, attempt)
+                continue
+            self.rate_limiter.succeeded()
+            return response
+        return None
+
+    async def _fetch_page_async(
+        self, query: str, page: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        for attempt in range(NEWSDATA_MAX_RETRIES + 1):
+            if self._quota_exhausted or not await self._acquire_token_async():
+                return None
+            try:
+                async with self._request_slots:
+                    with self.category_timer(query):
+                        response = await asyncio.to_thread(
+                            self._request_page, query, page
+                        )
+            except Exception as e:
+                self._on_api_error(query, e, attempt)
+                continue
+            self.rate_limiter.succeeded()
+            return response
+        return None
+
+    def _next_page(
+        self, query: str, response: Dict[str, Any], articles: List[Dict[str, Any]]
+    ) -> Optional[str]:
+        """Returns the cursor to follow, or None once the query has caught up.
 
-            results = response.get("results", [])
-            if not results:
-                logging.info(f"No articles found for category '{category}'.")
-                return []
+        Must run before the page is submitted, otherwise the writer may already
+        have stored its articles.
+        """
+        next_page = response.get("nextPage")
+        if not next_page or not articles:
+            return None
+        if self.known_article_ids([a["article_id"] for a in articles], query):
+            logging.info(f"Reached already stored articles for '{query}'.")
+            return None
+        return next_page
 
-            logging.info(f"Received {len(results)} articles for '{category}'.")
-            for article in results:
-                processed_articles.append(self._process_article(article))
+    def _submit_page(
+        self,
+        categories: List[str],
+        articles: List[Dict[str, Any]],
+        writer: ArticleWriter,
+    ) -> int:
+        """Files each article under the first of its categories in the query.
 
+        An article matching several grouped queries is submitted only once
+        per cycle. Returns the number submitted.
+        """
+        submitted = 0
+        for article in articles:
+            matched = [c for c in article.get("category") or [] if c in categories]
+            category = matched[0] if matched else categories[0]
+            with self._submitted_lock:
+                if article["article_id"] in self._submitted_ids:
+                    continue
+                self._submitted_ids.add(article["article_id"])
+                self._listed_by_category[category].append(
+                    (article["article_id"], self._published_at(article))
+                )
+            writer.submit(article, category)
+            submitted += 1
+        return submitted
+
+    def fetch_query_news(self, categories: List[str], writer: ArticleWriter) -> int:
+        """Pages through one grouped query; returns the articles submitted."""
+        query = ",".join(categories)
+        logging.info(f"Fetching news for categories: '{query.upper()}'")
+        submitted = 0
+        page = None
+        try:
+            for _ in range(self.max_pages):
+                response = self._fetch_page(query, page)
+                if response is None:
+                    break
+                articles = self._process_response(query, response)
+                articles, reached = self._apply_watermark(query, articles)
+                page = None if reached else self._next_page(query, response, articles)
+                submitted += self._submit_page(categories, articles, writer)
+                if page is None:
+                    break
         except Exception as e:
             logging.error(
-                f"An error occurred while fetching category '{category}': {e}",
-                exc_info=True,
+                f"An error occurred while fetching '{query}': {e}",
+                exc_info=not isinstance(e, QuotaExhaustedError),
             )
-        return processed_articles
+        return submitted
 
-    def fetch_all(self) -> bool:
-        total_saved = 0
-        total_skipped = 0
-        successful_categories = []
+    async def fetch_query_news_async(
+        self, categories: List[str], writer: ArticleWriter
+    ) -> int:
+        query = ",".join(categories)
+        logging.info(f"Fetching news for categories: '{query.upper()}'")
+        submitted = 0
+        page = None
+        try:
+            for _ in range(self.max_pages):
+                response = await self._fetch_page_async(query, page)
+                if response is None:
+                    break
+                articles = self._process_response(query, response)
+                articles, reached = self._apply_watermark(query, articles)
+                if reached:
+                    page = None
+                else:
+                    page = await asyncio.to_thread(
+                        self._next_page, query, response, articles
+                    )
+                # submit() blocks while the writer queue is full.
+                submitted += await asyncio.to_thread(
+                    self._submit_page, categories, articles, writer
+                )
+                if page is None:
+                    break
+        except Exception as e:
+            logging.error(
+                f"An error occurred while fetching '{query}': {e}",
+                exc_info=not isinstance(e, QuotaExhaustedError),
+            )
+        return submitted
 
-        for i, category in enumerate(self.CATEGORIES, 1):
-            logging.info(
-                f"--- Processing category {i}/{len(self.CATEGORIES)}: {category} ---"
+    def _fetch_queries_sequential(
+        self, queries: List[List[str]], writer: ArticleWriter
+    ):
+        for i, categories in enumerate(queries, 1):
+            if self.should_stop() or self._quota_exhausted:
+                logging.warning("Skipping remaining queries.")
+                break
+            logging.info(f"--- Processing query {i}/{len(queries)} ---")
+            self.fetch_query_news(categories, writer)
+
+    async def _fetch_queries_async(
+        self, queries: List[List[str]], writer: ArticleWriter
+    ):
+        # Caps requests in flight; pages of one query are fetched in order.
+        self._request_slots = asyncio.Semaphore(self.max_concurrency)
+        await asyncio.gather(*(self.fetch_query_news_async(q, writer) for q in queries))
+        if self.should_stop() or self._quota_exhausted:
+            logging.warning("Some queries were skipped.")
+
+    def category_keys(self) -> List[str]:
+        return list(self.CATEGORIES)
+
+    def fetch_all(self, categories: Optional[List[str]] = None) -> bool:
+        # A subset keeps the planned grouping, so each query keeps its watermark.
+        queries = [
+            query
+            for query in self.queries
+            if categories is None or set(query) & set(categories)
+        ]
+        polled = [category for query in queries for category in query]
+        logging.info(
+            f"Fetching {len(polled)} categories in {len(queries)} "
+            f"queries ({self.fetch_mode})."
+        )
+        with self.open_writer() as writer:
+            if self.fetch_mode == "async":
+                asyncio.run(self._fetch_queries_async(queries, writer))
+            else:
+                self._fetch_queries_sequential(queries, writer)
+        self.settle_watermarks(writer.failed_count == 0)
+        # Queries cut short by the quota or a stop say nothing about the feed.
+        completed = not (self._quota_exhausted or self.should_stop())
+        for category in polled:
+            self.record_category(
+                category,
+                self._listed_by_category.get(category, []),
+                writer.skipped_ids,
+                ok=completed,
             )
-            articles = self.fetch_category_news(category)
-            if articles:
-                saved, skipped = self.save_articles_to_firestore(articles, category)
-                if saved > 0:
-                    successful_categories.append(category)
-                total_saved += saved
-                total_skipped += skipped
-
-            # Respect API rate limits if any; add a small delay
-            if i < len(self.CATEGORIES):
-                time.sleep(2)
+
+        total_saved = writer.total_saved
+        total_skipped = writer.total_skipped
+        successful_categories = [
+            category
+            for category in polled
+            if writer.saved_by_category.get(category, 0) > 0
+        ]
 
         self.update_summary_document(
             total_saved=total_saved,
@@ -136,7 +436,7 @@ class APIFetcher(BaseFetcher):
                 f"Successful categories: {', '.join(successful_categories)}"
             )
 
-        failed_categories = set(self.CATEGORIES) - set(successful_categories)
+        failed_categories = set(polled) - set(successful_categories)
         if failed_categories:
             logging.warning(
                 f"Failed/Empty categories: {', '.join(failed_categories)}"
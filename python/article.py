@@ -0,0 +1,113 @@
+import os
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, Optional
+
+# "full" stores every field in every article document (schema version 1);
+# "compact" leaves out what the source document or description already holds.
+ARTICLE_SCHEMA = os.getenv("ARTICLE_SCHEMA", "full").lower()
+COMPACT_SCHEMA_VERSION = 2
+
+# Per-source constants kept once in the sources collection in compact mode.
+SOURCE_FIELDS = (
+    "source_name",
+    "source_url",
+    "source_icon",
+    "creator",
+    "language",
+    "country",
+)
+
+
+class Article(MutableMapping):
+    """An article being ingested, with a fixed set of fields in __slots__.
+
+    Behaves like the dicts the fetchers used to build, so article["title"],
+    article.get(...) and `"story_id" in article` keep working, but costs a
+    fraction of a dict per instance. Fields never set are absent, as missing
+    keys were, and are left out of the stored document.
+    """
+
+    __slots__ = (
+        "article_id",
+        "title",
+        "link",
+        "creator",
+        "video_url",
+        "description",
+        "content",
+        "pubDate",
+        "image_url",
+        "source_id",
+        "source_priority",
+        "source_name",
+        "source_url",
+        "source_icon",
+        "language",
+        "country",
+        "category",
+        "ai_tag",
+        "story_id",
+        "created_at",
+        "updated_at",
+    )
+
+    def __init__(self, **fields: Any):
+        for key, value in fields.items():
+            self[key] = value
+
+    def __getitem__(self, key: str) -> Any:
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in self.__slots__:
+            raise KeyError(f"Article has no field '{key}'.")
+        setattr(self, key, value)
+
+    def __delitem__(self, key: str):
+        try:
+            delattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return (key for key in self.__slots__ if hasattr(self, key))
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __repr__(self) -> str:
+        return f"Article({dict(self)!r})"
+
+
+def compact_document(
+    article: Dict[str, Any], source: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """Schema version 2: drops the source's constants and a copied description."""
+    document = dict(article)
+    if source and document.get("source_id") == source.get("source_id"):
+        for field in SOURCE_FIELDS:
+            if field in document and document[field] == source.get(field):
+                del document[field]
+    if "content" in document and document["content"] == document.get("description"):
+        del document["content"]
+    document["schema_version"] = COMPACT_SCHEMA_VERSION
+    return document
+
+
+def expand_document(
+    document: Dict[str, Any], sources: Dict[str, Dict[str, Any]]
+) -> Dict[str, Any]:
+    """Restores the full (version 1) fields of a document of either schema."""
+    article = dict(document)
+    if article.pop("schema_version", 1) < COMPACT_SCHEMA_VERSION:
+        return article
+    source = sources.get(article.get("source_id"), {})
+    for field in SOURCE_FIELDS:
+        if field not in article and field in source:
+            article[field] = source[field]
+    if "content" not in article:
+        article["content"] = article.get("description")
+    return article
@@ -1,80 +1,330 @@
 import os
-import sys
 import logging
+import time
 import hashlib
+import threading
 from datetime import datetime
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Tuple
+from typing import Collection, List, Dict, Any, Optional, Set, Tuple
 
 from dotenv import load_dotenv
-import firebase_admin
-from firebase_admin import credentials, firestore
+
+from article import ARTICLE_SCHEMA, compact_document
+from dedup import NEAR_DUP_MODE, get_near_dup_index
+from enrichment import ContentEnricher
+from log_context import configure_logging, log_source
+from metrics import (
+    ARTICLES,
+    BYTES_DOWNLOADED,
+    CATEGORY_FETCH_SECONDS,
+    FETCH_RUN_SECONDS,
+    LAST_RUN_SAVED,
+    LAST_RUN_TIMESTAMP,
+    NEAR_DUPLICATES,
+    PARSE_SECONDS,
+    SEEN_CACHE_HITS,
+)
+from pipeline import ArticleWriter
+from seen_cache import get_seen_cache
+from storage import MAX_BATCH_SIZE, StorageBackend, create_storage
+from watermark import WatermarkTracker
+from write_engine import WRITE_ENGINE, WriteStats
+
+_env_loaded = False
+_env_lock = threading.Lock()
+
+
+def load_environment():
+    """Reads the repository's .env into os.environ, once per process."""
+    global _env_loaded
+    with _env_lock:
+        if not _env_loaded:
+            load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+            _env_loaded = True
 
 
 class BaseFetcher(ABC):
 
     def __init__(self, source_id: str):
         self.source_id = source_id
-        self.db = None
+        self.log_label = source_id.upper()
+        self.storage: StorageBackend = None
         self.articles_collection = "articles"
         self.summary_collection = "news_data"
-        self._setup_logging()
+        self._stop_event = threading.Event()
+        # Instances live across scheduler cycles; one cycle runs at a time.
+        self._run_lock = threading.Lock()
+        self._warmed_up = False
+        self.write_stats = WriteStats()
+        configure_logging()
         self._load_config()
-        self._init_firebase()
+        self._init_storage()
+        self.seen_cache = get_seen_cache()
+        self.near_dup_index = get_near_dup_index()
+        self.watermarks = WatermarkTracker()
+        # False when this run could not read the stored watermarks.
+        self._watermarks_loaded = False
+        self._registered_source: Optional[Dict[str, Any]] = None
+        # Outcome of every category polled by the current run, for the scheduler.
+        self.category_results: Dict[str, Dict[str, Any]] = {}
+        # True while a run polls only some of the categories.
+        self._partial_run = False
 
-    def _setup_logging(self):
-        for handler in logging.root.handlers[:]:
-            logging.root.removeHandler(handler)
+    def warm_up(self):
+        """Prepares state kept across cycles; runs once, before the first cycle."""
+        self._warm_seen_cache()
+        self._warm_near_dup_index()
+        self._warmed_up = True
 
-        logging.basicConfig(
-            level=logging.INFO,
-            format=f"%(asctime)s - %(levelname)s - [{self.source_id.upper()}] - %(message)s",
-            stream=sys.stdout,
-        )
+    def reset(self):
+        """Clears per-cycle state at the start of every run."""
+        self._stop_event.clear()
+        self.write_stats = WriteStats()
+        self.category_results = {}
+        self._load_watermarks()
+
+    def shutdown(self):
+        """Stops any running cycle and persists caches before the process exits."""
+        self._stop_event.set()
+        if self.seen_cache is not None:
+            self.seen_cache.save()
 
     def _load_config(self):
-        env_path = os.path.join(os.path.dirname(__file__), "..", ".env")
-        load_dotenv(env_path)
+        load_environment()
         self.articles_collection = os.getenv("ARTICLES_COLLECTION", "articles")
         self.summary_collection = os.getenv("NEWS_COLLECTION", "news_data")
         logging.info("Configuration loaded.")
 
-    def _init_firebase(self):
-        if firebase_admin._apps:
-            self.db = firestore.client()
-            logging.info("Firebase already initialized. Using existing app.")
-            return
+    def _init_storage(self):
+        self.storage = create_storage(self.articles_collection, self.summary_collection)
 
-        service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH")
-        if not service_account_path:
-            raise ValueError(
-                "FIREBASE_SERVICE_ACCOUNT_PATH environment variable is required."
+    def _warm_seen_cache(self):
+        warm_limit = int(os.getenv("SEEN_CACHE_WARM_LIMIT", "1000"))
+        if self.seen_cache is None or len(self.seen_cache) > 0 or warm_limit <= 0:
+            return
+        try:
+            self.seen_cache.add_many(self.storage.recent_article_ids(warm_limit))
+            logging.info(
+                f"Seen-ID cache warmed with {len(self.seen_cache)} recent article IDs."
             )
+        except Exception as e:
+            logging.warning(f"Could not warm seen-ID cache from storage: {e}")
 
-        if not os.path.isabs(service_account_path):
-            service_account_path = os.path.join(
-                os.path.dirname(__file__), service_account_path
+    def _warm_near_dup_index(self):
+        warm_limit = int(os.getenv("NEAR_DUP_WARM_LIMIT", "1000"))
+        index = self.near_dup_index
+        if index is None or len(index) > 0 or warm_limit <= 0:
+            return
+        try:
+            recent = self.storage.recent_articles(
+                warm_limit, ["title", "description", "story_id"]
             )
+            indexed = index.warm(reversed(recent))
+            logging.info(f"Near-duplicate index warmed with {indexed} recent articles.")
+        except Exception as e:
+            logging.warning(f"Could not warm near-duplicate index from storage: {e}")
 
-        if not os.path.exists(service_account_path):
-            raise FileNotFoundError(
-                f"Service account file not found at resolved path: {service_account_path}"
-            )
+    def source_metadata(self) -> Optional[Dict[str, Any]]:
+        """Fields every article of this source shares, stored once in compact mode."""
+        return None
+
+    def _register_source(self):
+        metadata = self.source_metadata()
+        if ARTICLE_SCHEMA != "compact" or metadata is None:
+            return
+        try:
+            self.storage.upsert_source(metadata["source_id"], metadata)
+            self._registered_source = metadata
+        except Exception as e:
+            # Without its source document an article must keep the fields itself.
+            self._registered_source = None
+            logging.warning(f"Could not store source document, not compacting: {e}")
 
+    def to_document(self, article: Dict[str, Any]) -> Dict[str, Any]:
+        """The stored form of an article under ARTICLE_SCHEMA."""
+        if ARTICLE_SCHEMA == "compact":
+            return compact_document(article, self._registered_source)
+        return dict(article)
+
+    def _load_watermarks(self):
+        self._watermarks_loaded = False
         try:
-            cred = credentials.Certificate(service_account_path)
-            firebase_admin.initialize_app(cred)
-            self.db = firestore.client()
-            logging.info("Firebase initialized successfully.")
+            summary = self.storage.get_summary(f"summary_{self.source_id}") or {}
+            marks = summary.get("watermarks") or {}
+            self.watermarks.load(marks)
+            self._watermarks_loaded = True
+            logging.info(f"Loaded watermarks for {len(marks)} categories.")
         except Exception as e:
-            logging.error(f"Failed to initialize Firebase: {e}", exc_info=True)
-            raise
+            # The tracker still holds the last run's marks, or none at all;
+            # writing it back could erase marks stored since.
+            logging.warning(
+                f"Could not load watermarks, they will not be saved this run: {e}"
+            )
+
+    def settle_watermarks(self, stored_everything: bool):
+        """Commits the run's watermarks, or drops them if some articles were not stored."""
+        if stored_everything:
+            self.watermarks.commit()
+        else:
+            logging.warning("Not all articles were stored; watermarks left unchanged.")
+            self.watermarks.discard()
+
+    def request_stop(self):
+        self._stop_event.set()
+        logging.warning(f"Stop requested for {self.source_id.upper()} fetcher.")
+
+    def should_stop(self) -> bool:
+        return self._stop_event.is_set()
+
+    def _sleep(self, seconds: float) -> bool:
+        """Sleep that wakes up early on request_stop(). Returns False if stopped."""
+        return not self._stop_event.wait(seconds)
+
+    def category_timer(self, category_name: str):
+        """Context manager timing one category fetch for the metrics endpoint."""
+        return CATEGORY_FETCH_SECONDS.time(
+            source=self.source_id, category=category_name
+        )
+
+    def parse_timer(self):
+        return PARSE_SECONDS.time(source=self.source_id)
+
+    def record_download(self, num_bytes: int):
+        BYTES_DOWNLOADED.inc(num_bytes, source=self.source_id)
 
     def _generate_article_id(self, link: str) -> str:
         if not link:
             raise ValueError("Link cannot be empty for generating an article ID.")
         return hashlib.md5(link.encode("utf-8")).hexdigest()
 
+    def known_article_ids(self, article_ids: List[str], label: str) -> Set[str]:
+        """Returns the IDs that are already stored, checking the seen cache first."""
+        # Known IDs skip the remote existence check; only misses are read.
+        unknown_ids = article_ids
+        if self.seen_cache is not None:
+            unknown_ids = self.seen_cache.filter_unknown(article_ids)
+        existing_ids = set(article_ids) - set(unknown_ids)
+        cache_hits = len(existing_ids)
+        SEEN_CACHE_HITS.inc(cache_hits, source=self.source_id)
+
+        if unknown_ids:
+            remote_ids = self.storage.existing_ids(unknown_ids)
+            existing_ids |= remote_ids
+            if self.seen_cache is not None:
+                self.seen_cache.add_many(remote_ids)
+        logging.info(
+            f"Existence check for '{label}': {cache_hits} cache hits, "
+            f"{len(unknown_ids)} storage reads."
+        )
+        return existing_ids
+
+    def _assign_stories(
+        self, articles: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Sets each article's story_id; in skip mode drops later copies of a story.
+
+        Returns the articles to store and the IDs of the dropped copies.
+        """
+        if self.near_dup_index is None:
+            return articles, []
+        kept = []
+        duplicate_ids = []
+        for article in articles:
+            story_id = self.near_dup_index.assign(article)
+            if story_id != article["article_id"]:
+                NEAR_DUPLICATES.inc(source=self.source_id)
+                if NEAR_DUP_MODE == "skip":
+                    duplicate_ids.append(article["article_id"])
+                    continue
+            article["story_id"] = story_id
+            kept.append(article)
+        if duplicate_ids:
+            logging.info(f"Dropped {len(duplicate_ids)} near-duplicate articles.")
+        return kept, duplicate_ids
+
+    def _forget_stories(self, article_ids: List[str]):
+        # Unstored articles must not become the story of later copies.
+        if self.near_dup_index is not None:
+            self.near_dup_index.forget(article_ids)
+
+    def _write_batch(
+        self, batch_articles: List[Dict[str, Any]], category_name: str
+    ) -> Tuple[List[str], List[str]]:
+        """Stores the new articles of one batch; returns (saved_ids, skipped_ids).
+
+        Articles that could not be stored are logged and left out of both lists.
+        """
+        article_ids = [
+            article["article_id"]
+            for article in batch_articles
+            if "article_id" in article
+        ]
+        if not article_ids:
+            return [], []
+
+        existing_ids = self.known_article_ids(article_ids, category_name)
+
+        new_articles = []
+        skipped_ids = []
+        for article in batch_articles:
+            article_id = article.get("article_id")
+            if not article_id:
+                logging.warning(
+                    f"Skipping article with no ID: {article.get('title', 'N/A')}"
+                )
+                continue
+
+            if article_id not in existing_ids:
+                new_articles.append(article)
+            else:
+                skipped_ids.append(article_id)
+
+        new_articles, duplicate_ids = self._assign_stories(new_articles)
+        skipped_ids.extend(duplicate_ids)
+        ARTICLES.inc(len(skipped_ids), source=self.source_id, result="skipped")
+        if not new_articles:
+            return [], skipped_ids
+
+        documents = [self.to_document(article) for article in new_articles]
+        if WRITE_ENGINE == "bulk":
+            start = time.monotonic()
+            saved_ids, failed_ids, retries = self.storage.bulk_insert(documents)
+            self.write_stats.record(
+                len(saved_ids), len(failed_ids), retries, time.monotonic() - start
+            )
+            ARTICLES.inc(len(failed_ids), source=self.source_id, result="failed")
+            if failed_ids:
+                self._forget_stories(failed_ids)
+                logging.error(
+                    f"Failed to store {len(failed_ids)} articles for '{category_name}'."
+                )
+            logging.info(
+                f"Bulk wrote {len(saved_ids)} new articles for '{category_name}'."
+            )
+        else:
+            saved_ids = [article["article_id"] for article in new_articles]
+            start = time.monotonic()
+            try:
+                self.storage.insert_articles(documents)
+                self.write_stats.record(len(saved_ids), 0, 0, time.monotonic() - start)
+                logging.info(
+                    f"Committed batch of {len(new_articles)} new articles for '{category_name}'."
+                )
+            except Exception as e:
+                self.write_stats.record(0, len(saved_ids), 0, time.monotonic() - start)
+                ARTICLES.inc(len(saved_ids), source=self.source_id, result="failed")
+                self._forget_stories(saved_ids)
+                logging.error(
+                    f"Error committing batch for '{category_name}': {e}",
+                    exc_info=True,
+                )
+                return [], skipped_ids
+
+        ARTICLES.inc(len(saved_ids), source=self.source_id, result="saved")
+        if self.seen_cache is not None:
+            self.seen_cache.add_many(saved_ids)
+        return saved_ids, skipped_ids
+
     def save_articles_to_firestore(
         self, articles: List[Dict[str, Any]], category_name: str
     ) -> Tuple[int, int]:
@@ -84,63 +334,30 @@ class BaseFetcher(ABC):
 
         saved_count = 0
         skipped_count = 0
-        batch_size = 500  # Firestore batch write limit
+        batch_size = MAX_BATCH_SIZE
 
         for i in range(0, len(articles), batch_size):
-            batch = self.db.batch()
-            batch_articles = articles[i : i + batch_size]
-            writes_in_batch = 0
-
-            article_ids = [
-                article["article_id"]
-                for article in batch_articles
-                if "article_id" in article
-            ]
-            if not article_ids:
-                continue
-
-            docs_ref = [
-                self.db.collection(self.articles_collection).document(id)
-                for id in article_ids
-            ]
-            existing_docs = self.db.get_all(docs_ref)
-            existing_ids = {doc.id for doc in existing_docs if doc.exists}
-
-            for article in batch_articles:
-                article_id = article.get("article_id")
-                if not article_id:
-                    logging.warning(
-                        f"Skipping article with no ID: {article.get('title', 'N/A')}"
-                    )
-                    continue
-
-                if article_id not in existing_ids:
-                    doc_ref = self.db.collection(self.articles_collection).document(
-                        article_id
-                    )
-                    batch.set(doc_ref, article)
-                    writes_in_batch += 1
-                else:
-                    skipped_count += 1
-
-            if writes_in_batch > 0:
-                try:
-                    batch.commit()
-                    logging.info(
-                        f"Committed batch of {writes_in_batch} new articles for '{category_name}'."
-                    )
-                    saved_count += writes_in_batch
-                except Exception as e:
-                    logging.error(
-                        f"Error committing batch for '{category_name}': {e}",
-                        exc_info=True,
-                    )
+            saved_ids, skipped_ids = self._write_batch(
+                articles[i : i + batch_size], category_name
+            )
+            saved_count += len(saved_ids)
+            skipped_count += len(skipped_ids)
 
+        if self.seen_cache is not None:
+            self.seen_cache.save()
         logging.info(
             f"Category '{category_name}': Saved {saved_count} new, skipped {skipped_count} existing articles."
         )
         return saved_count, skipped_count
 
+    def open_writer(self) -> ArticleWriter:
+        """Starts a streaming writer; fetchers submit() articles as they are parsed."""
+        return ArticleWriter(self._write_batch, on_close=self._on_writer_closed)
+
+    def _on_writer_closed(self):
+        if self.seen_cache is not None:
+            self.seen_cache.save()
+
     def update_summary_document(
         self,
         total_saved: int,
@@ -151,22 +368,28 @@ class BaseFetcher(ABC):
     ):
         summary_doc_id = f"summary_{self.source_id}"
         logging.info(f"Updating summary document: {summary_doc_id}")
+        counts = {
+            "total_articles_saved": total_saved,
+            "total_articles_skipped": total_skipped,
+            "categories_processed": categories_processed,
+        }
+        summary = {
+            "status": status,
+            "last_updated": datetime.now(),
+            "fetch_timestamp": datetime.now().isoformat(),
+            "fetch_type": fetch_type,
+            "source": self.source_id,
+        }
+        # A poll of some categories keeps the totals of the last full run and
+        # reports its own under last_poll.
+        if self._partial_run:
+            summary["last_poll"] = counts
+        else:
+            summary.update(counts)
+        if self._watermarks_loaded:
+            summary["watermarks"] = self.watermarks.to_dict()
         try:
-            doc_ref = self.db.collection(self.summary_collection).document(
-                summary_doc_id
-            )
-            doc_ref.set(
-                {
-                    "status": status,
-                    "total_articles_saved": total_saved,
-                    "total_articles_skipped": total_skipped,
-                    "categories_processed": categories_processed,
-                    "last_updated": datetime.now(),
-                    "fetch_timestamp": datetime.now().isoformat(),
-                    "fetch_type": fetch_type,
-                    "source": self.source_id,
-                }
-            )
+            self.storage.upsert_summary(summary_doc_id, summary, merge=True)
             logging.info(
                 f"Summary updated: {total_saved} new, {total_skipped} skipped from {len(categories_processed)} categories."
             )
@@ -174,17 +397,61 @@ class BaseFetcher(ABC):
             logging.error(f"Error updating summary document: {e}", exc_info=True)
 
     @abstractmethod
-    def fetch_all(self) -> bool:
+    def fetch_all(self, categories: Optional[List[str]] = None) -> bool:
+        """Fetches the given category keys, or every category when None."""
         pass
 
-    def run(self):
+    def category_keys(self) -> List[str]:
+        """Keys of the categories this fetcher polls, as fetch_all accepts them."""
+        return []
+
+    def record_category(
+        self,
+        key: str,
+        listed: List[Tuple[str, Optional[datetime]]],
+        skipped_ids: Collection[str] = (),
+        ok: bool = True,
+    ):
+        """Notes how many new articles a category had and when they came out.
+
+        `listed` holds the (article_id, published) pairs the category returned
+        past its watermark; those the writer skipped as already stored are not
+        new. Call it once the run's writer is closed.
+        """
+        published = [p for article_id, p in listed if article_id not in skipped_ids]
+        dated = [p for p in published if p is not None]
+        self.category_results[key] = {
+            "new": len(published),
+            "ok": ok,
+            "oldest": min(dated) if dated else None,
+            "newest": max(dated) if dated else None,
+        }
+
+    def run(self, categories: Optional[List[str]] = None):
+        with log_source(self.log_label):
+            if not self._run_lock.acquire(blocking=False):
+                logging.warning("The previous run is still going, skipping this one.")
+                return
+            try:
+                if not self._warmed_up:
+                    self.warm_up()
+                self.reset()
+                self._run_cycle(categories)
+            finally:
+                self._run_lock.release()
+
+    def _run_cycle(self, categories: Optional[List[str]] = None):
+        self._partial_run = categories is not None and bool(
+            set(self.category_keys()) - set(categories)
+        )
         logging.info("=" * 60)
         logging.info(f"STARTING {self.source_id.upper()} FETCH PROCESS")
         logging.info("=" * 60)
         start_time = datetime.now()
+        self._register_source()
 
         try:
-            success = self.fetch_all()
+            success = self.fetch_all(categories)
             if success:
                 logging.info(
                     f"SUCCESS! {self.source_id.upper()} news fetched and saved!"
@@ -200,6 +467,41 @@ class BaseFetcher(ABC):
             )
         finally:
             duration = datetime.now() - start_time
+            FETCH_RUN_SECONDS.observe(duration.total_seconds(), source=self.source_id)
+            LAST_RUN_TIMESTAMP.set(time.time(), source=self.source_id)
+            LAST_RUN_SAVED.set(self.write_stats.written, source=self.source_id)
+            self.write_stats.log(f"{self.source_id.upper()} ({WRITE_ENGINE} engine)")
             logging.info("PROCESS COMPLETED!")
             logging.info(f"Total execution time: {duration}")
             logging.info("=" * 60)
+
+
+class EnrichingFetcher(BaseFetcher):
+    """A fetcher that can scrape the full text of the articles it stored.
+
+    Only fetchers whose articles arrive without their body subclass this, so
+    the enrichment worker never meets a source that cannot scrape.
+    """
+
+    content_workers = 1
+
+    @abstractmethod
+    def scrape_full_article_content(self, url: str) -> str:
+        pass
+
+    def scrape_content_for_existing_articles(self, limit: int = 10) -> int:
+        logging.info(f"Starting to scrape full content for up to {limit} articles.")
+        try:
+            enricher = ContentEnricher(
+                self.storage,
+                self.source_id,
+                self.scrape_full_article_content,
+                workers=self.content_workers,
+                should_stop=self.should_stop,
+            )
+            return enricher.run(limit)
+        except Exception:
+            logging.error(
+                "An error occurred during content scraping batch.", exc_info=True
+            )
+            return 0
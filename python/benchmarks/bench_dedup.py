@@ -0,0 +1,120 @@
+"""Benchmark for the near-duplicate index as its window grows.
+
+Synthetic articles draw their words from a Zipf distribution over the
+syllables of the recorded VnExpress feed (padded with made-up ones), so
+unrelated articles share the common bigrams a real window does; every tenth
+lookup is a lightly edited copy of an indexed article. For each window size
+the index is filled, then looked up with fresh articles, reporting the
+candidates compared in full per lookup, lookup latency and how many planted
+copies were found. Run from the python/ directory:
+
+    python benchmarks/bench_dedup.py [--windows 1000 5000 20000] [--bands 16]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from itertools import accumulate
+from typing import List
+
+import feedparser
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import (  # noqa: E402
+    NEAR_DUP_BANDS,
+    NEAR_DUP_PERMUTATIONS,
+    NEAR_DUP_THRESHOLD,
+    NearDuplicateIndex,
+    shingles,
+)
+from html_extract import extract_text_and_image  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+LOOKUPS = 1000
+VOCABULARY_SIZE = 8000
+
+
+class Corpus:
+    def __init__(self, path: str):
+        words: List[str] = []
+        for entry in feedparser.parse(path).entries:
+            text = f"{entry.title} {extract_text_and_image(entry.description)[0]}"
+            words.extend(w for w in text.lower().split() if w not in words)
+        words += [f"từ{i}" for i in range(VOCABULARY_SIZE - len(words))]
+        self.words = words
+        self.weights = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+
+    def article(self, rng: random.Random, n: int, words: List[str] = None):
+        words = words or rng.choices(self.words, cum_weights=self.weights, k=40)
+        return {
+            "article_id": f"a{n}",
+            "title": " ".join(words[:12]),
+            "description": " ".join(words[12:]),
+        }
+
+    def edited_copy(self, article, rng: random.Random, n: int):
+        words = f"{article['title']} {article['description']}".split()
+        for _ in range(3):
+            words[rng.randrange(len(words))] = rng.choice(self.words)
+        return self.article(rng, n, words)
+
+
+def run(window: int, bands: int, corpus: Corpus, seed: int):
+    rng = random.Random(seed)
+    # Room for the lookups, so no planted copy's original is evicted.
+    index = NearDuplicateIndex(bands=bands, window=window + LOOKUPS)
+    stories = []
+    for n in range(window):
+        article = corpus.article(rng, n)
+        stories.append((article, index.assign(article)))
+
+    candidates = found = planted = 0
+    start = time.perf_counter()
+    for n in range(window, window + LOOKUPS):
+        if n % 10 == 0:
+            original, story_id = rng.choice(stories)
+            article = corpus.edited_copy(original, rng, n)
+            planted += 1
+        else:
+            story_id, article = None, corpus.article(rng, n)
+        signature = index.signature(article)
+        seen = set()
+        for band, key in index._bands(signature):
+            seen |= index._buckets[band].get(key, set())
+        candidates += len(seen)
+        found += index.assign(article) == story_id
+    elapsed = time.perf_counter() - start
+    print(
+        f"  {window:>7} {bands:>6} {index.rows:>5} {candidates / LOOKUPS:>11.1f}"
+        f" {elapsed / LOOKUPS * 1e6:>10.0f} {found:>6}/{planted}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--windows", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--bands", type=int, nargs="+", default=[NEAR_DUP_BANDS])
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = Corpus(os.path.join(FIXTURES_DIR, "vnexpress_tin-moi-nhat.rss"))
+    sample = corpus.article(random.Random(args.seed), 0)
+    print(
+        f"{NEAR_DUP_PERMUTATIONS} permutations, threshold {NEAR_DUP_THRESHOLD}, "
+        f"{len(shingles(sample['title'] + ' ' + sample['description']))} shingles "
+        f"per article, {LOOKUPS} lookups.\n"
+    )
+    print(
+        f"  {'window':>7} {'bands':>6} {'rows':>5} {'candidates':>11}"
+        f" {'us/lookup':>10} {'copies found':>12}"
+    )
+    for bands in args.bands:
+        for window in args.windows:
+            run(window, bands, corpus, args.seed)
+
+
+if __name__ == "__main__":
+    main()
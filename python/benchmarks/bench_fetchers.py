@@ -0,0 +1,229 @@
+"""Offline end-to-end benchmark for the fetchers.
+
+Each fetcher runs in its own subprocess against the stub server (recorded
+fixtures, no network) with STORAGE_BACKEND=memory, and reports articles/sec,
+per-stage latency and peak RSS. Other settings (RSS_MAX_WORKERS,
+WRITE_ENGINE, ...) are taken from the environment, so two configurations can
+be compared by running the benchmark twice. Run from the python/ directory:
+
+    python benchmarks/bench_fetchers.py [--fetchers rss api dantri]
+        [--latency-ms 20] [--json results.json]
+
+Politeness delays (DanTri request interval, NewsData rate limit) are skipped
+unless --with-delays is given, so the numbers reflect processing cost.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import resource
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+from typing import Any, Callable, Dict, List
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+FETCHERS = ["rss", "api", "dantri"]
+STAGES = ["fetch", "parse", "normalize", "dedup", "write"]
+
+
+class StageTimer:
+    """Accumulates call count and latency per stage for wrapped callables."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.total: Dict[str, float] = defaultdict(float)
+        self.max: Dict[str, float] = defaultdict(float)
+
+    def wrap(self, owner: Any, name: str, stage: str):
+        original = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.record(stage, time.perf_counter() - start)
+
+        setattr(owner, name, timed)
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.calls[stage] += 1
+            self.total[stage] += seconds
+            self.max[stage] = max(self.max[stage], seconds)
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        return {
+            stage: {
+                "calls": self.calls[stage],
+                "total_s": round(self.total[stage], 4),
+                "mean_ms": round(self.total[stage] / self.calls[stage] * 1000, 3),
+                "max_ms": round(self.max[stage] * 1000, 3),
+            }
+            for stage in STAGES
+            if self.calls[stage]
+        }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def _build_fetcher(name: str, base_url: str, timer: StageTimer):
+    import lxml.html
+    import feedparser
+
+    from write_engine import WRITE_ENGINE
+
+    if name == "rss":
+        from rss_fetcher import RSSFetcher, VNEXPRESS_CONFIG
+
+        fetcher = RSSFetcher()
+        fetcher.config = dict(
+            VNEXPRESS_CONFIG, base_url=base_url, base_rss_url=f"{base_url}/rss"
+        )
+        timer.wrap(fetcher.session, "get", "fetch")
+        timer.wrap(feedparser, "parse", "parse")
+        timer.wrap(fetcher, "_parse_rss_entry", "normalize")
+    elif name == "api":
+        os.environ.setdefault("NEWS_API_KEY", "benchmark")
+        from api_fetcher import APIFetcher
+        from stub_server import StubNewsDataClient
+
+        fetcher = APIFetcher()
+        fetcher.api_client = StubNewsDataClient(base_url)
+        timer.wrap(fetcher.api_client.session, "get", "fetch")
+        timer.wrap(fetcher.api_client, "decode", "parse")
+        timer.wrap(fetcher, "_process_article", "normalize")
+    elif name == "dantri":
+        from selenium_fetcher import SeleniumFetcher
+
+        fetcher = SeleniumFetcher()
+        fetcher.BASE_URL = base_url
+        fetcher.fetch_mode = "http"
+        timer.wrap(fetcher.session, "get", "fetch")
+        timer.wrap(lxml.html, "fromstring", "parse")
+        timer.wrap(fetcher, "_create_article_dict", "normalize")
+    else:
+        raise ValueError(f"Unknown fetcher '{name}'.")
+
+    timer.wrap(fetcher.storage, "existing_ids", "dedup")
+    if fetcher.seen_cache is not None:
+        timer.wrap(fetcher.seen_cache, "filter_unknown", "dedup")
+    write_method = "bulk_insert" if WRITE_ENGINE == "bulk" else "insert_articles"
+    timer.wrap(fetcher.storage, write_method, "write")
+    return fetcher
+
+
+def run_worker(name: str, base_url: str, result_path: str, with_delays: bool):
+    """Runs one fetcher in this process and writes its measurements as JSON."""
+    import logging
+
+    timer = StageTimer()
+    fetcher = _build_fetcher(name, base_url, timer)
+    logging.getLogger().setLevel(os.getenv("BENCH_LOG_LEVEL", "WARNING"))
+    if not with_delays:
+        fetcher._sleep = lambda seconds: not fetcher.should_stop()
+        if hasattr(fetcher, "request_interval"):
+            fetcher.request_interval = 0.0
+        if hasattr(fetcher, "rate_limiter"):
+            from rate_limit import AdaptiveTokenBucket
+
+            fetcher.rate_limiter = AdaptiveTokenBucket(1e6)
+    rss_before = _peak_rss_mb()
+
+    start = time.perf_counter()
+    fetcher.run()
+    elapsed = time.perf_counter() - start
+
+    articles = len(fetcher.storage.articles)
+    result = {
+        "fetcher": name,
+        "articles": articles,
+        "seconds": round(elapsed, 3),
+        "articles_per_second": round(articles / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "startup_rss_mb": rss_before,
+        "stages": timer.snapshot(),
+    }
+    with open(result_path, "w") as f:
+        json.dump(result, f)
+
+
+def run_fetcher(
+    name: str, base_url: str, state_dir: str, with_delays: bool
+) -> Dict[str, Any]:
+    result_path = os.path.join(state_dir, f"{name}.json")
+    env = dict(os.environ)
+    env["STORAGE_BACKEND"] = "memory"
+    env["SEEN_CACHE_PATH"] = os.path.join(state_dir, f"{name}_seen.json")
+    env["RSS_CACHE_PATH"] = os.path.join(state_dir, f"{name}_rss.json")
+    command = [sys.executable, os.path.abspath(__file__), "--worker", name]
+    command += ["--base-url", base_url, "--result", result_path]
+    if with_delays:
+        command.append("--with-delays")
+    subprocess.run(command, env=env, check=True, stdout=subprocess.DEVNULL)
+    with open(result_path) as f:
+        return json.load(f)
+
+
+def print_report(results: List[Dict[str, Any]], out: Callable = print):
+    out(f"{'fetcher':<8} {'articles':>8} {'seconds':>8} {'art/s':>9} {'peak MB':>8}")
+    for r in results:
+        out(
+            f"{r['fetcher']:<8} {r['articles']:>8} {r['seconds']:>8.2f} "
+            f"{r['articles_per_second']:>9.1f} {r['peak_rss_mb']:>8.1f}"
+        )
+    for r in results:
+        out(f"\n{r['fetcher']} stages:")
+        out(f"  {'stage':<10} {'calls':>6} {'total s':>8} {'mean ms':>9} {'max ms':>9}")
+        for stage, s in r["stages"].items():
+            out(
+                f"  {stage:<10} {s['calls']:>6} {s['total_s']:>8.3f} "
+                f"{s['mean_ms']:>9.3f} {s['max_ms']:>9.3f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--fetchers", nargs="+", choices=FETCHERS, default=FETCHERS)
+    parser.add_argument(
+        "--latency-ms", type=float, default=0.0, help="Added stub server latency."
+    )
+    parser.add_argument("--json", metavar="PATH", help="Also write results as JSON.")
+    parser.add_argument("--with-delays", action="store_true")
+    parser.add_argument("--worker", choices=FETCHERS, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    parser.add_argument("--result", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.base_url, args.result, args.with_delays)
+        return
+
+    from stub_server import StubServer
+
+    results = []
+    with StubServer(latency_ms=args.latency_ms) as server, tempfile.TemporaryDirectory(
+        prefix="genews-bench-"
+    ) as state_dir:
+        for name in args.fetchers:
+            results.append(run_fetcher(name, server.url, state_dir, args.with_delays))
+
+    print_report(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Micro-benchmark for RSS description and article body extraction.
+
+Compares the previous BeautifulSoup/html.parser path (two parses per entry)
+with the single-pass lxml path in html_extract, on the fixtures in
+benchmarks/fixtures. Run from the python/ directory:
+
+    python benchmarks/bench_html_extract.py [--repeat N] [--feed PATH]
+"""
+
+import os
+import sys
+import time
+import argparse
+from typing import Callable, List
+
+import feedparser
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import html_extract  # noqa: E402
+from rss_fetcher import UNWANTED_SELECTORS, VNEXPRESS_CONFIG  # noqa: E402
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+EDGE_FEED = "vnexpress_edge_cases.rss"
+EDGE_ARTICLE = "vnexpress_article_edge_cases.html"
+# One raw description per line: script, style and CDATA that feedparser's
+# sanitizer would strip from EDGE_FEED before extraction sees them.
+EDGE_DESCRIPTIONS = "description_edge_cases.txt"
+
+
+def legacy_entry(description: str):
+    soup = BeautifulSoup(description, "html.parser")
+    img_tag = soup.find("img")
+    image_url = img_tag["src"] if img_tag and img_tag.get("src") else None
+
+    soup = BeautifulSoup(description, "html.parser")
+    for tag in soup.find_all(["img", "br"]):
+        tag.decompose()
+    return soup.get_text(separator=" ", strip=True), image_url
+
+
+def legacy_body(page: bytes, selectors: List[str]):
+    soup = BeautifulSoup(page, "html.parser")
+    for selector in selectors:
+        content_div = soup.select_one(selector)
+        if content_div:
+            for unwanted in content_div.find_all(["script", "style", ".ads", "figure"]):
+                unwanted.decompose()
+            return content_div.get_text(separator="\n", strip=True)
+    return None
+
+
+def bench(label: str, fn: Callable, inputs: List, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for item in inputs:
+            fn(item)
+    elapsed = time.perf_counter() - start
+    rate = len(inputs) * repeat / elapsed
+    print(f"  {label:<28} {rate:>10.0f} /s  ({elapsed:.2f}s)")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument(
+        "--feed", default=os.path.join(FIXTURES_DIR, "vnexpress_tin-moi-nhat.rss")
+    )
+    parser.add_argument(
+        "--article", default=os.path.join(FIXTURES_DIR, "vnexpress_article.html")
+    )
+    args = parser.parse_args()
+
+    descriptions = [
+        e.get("description", "") for e in feedparser.parse(args.feed).entries
+    ]
+    # Parity is also checked on markup the recorded feed happens not to use.
+    edge_cases = [
+        e.get("description", "")
+        for e in feedparser.parse(os.path.join(FIXTURES_DIR, EDGE_FEED)).entries
+    ]
+    with open(os.path.join(FIXTURES_DIR, EDGE_DESCRIPTIONS), encoding="utf-8") as f:
+        edge_cases += [line.rstrip("\n") for line in f if line.strip()]
+    for description in descriptions + edge_cases:
+        expected = legacy_entry(description)
+        assert html_extract.extract_text_and_image(description) == expected, expected
+
+    print(f"RSS entries ({len(descriptions)} per feed, x{args.repeat}):")
+    before = bench("bs4 html.parser, 2 parses", legacy_entry, descriptions, args.repeat)
+    fallback = html_extract._extract_text_and_image_bs4
+    bench("bs4 html.parser, 1 parse", fallback, descriptions, args.repeat)
+    after = bench(
+        "lxml, 1 parse", html_extract.extract_text_and_image, descriptions, args.repeat
+    )
+    print(f"  speed-up: {after / before:.1f}x")
+
+    with open(args.article, "rb") as f:
+        page = f.read()
+    selectors = VNEXPRESS_CONFIG["content_selectors"]
+    with open(os.path.join(FIXTURES_DIR, EDGE_ARTICLE), "rb") as f:
+        edge_page = f.read()
+    for body in (page, edge_page):
+        expected = html_extract._extract_main_text_bs4(
+            body, selectors, UNWANTED_SELECTORS
+        )
+        actual = html_extract.extract_main_text(body, selectors, UNWANTED_SELECTORS)
+        assert actual == expected, (actual, expected)
+    pages = [page] * 10
+    print(f"Article bodies ({len(page)} bytes, x{args.repeat * len(pages)}):")
+    before = bench(
+        "bs4 html.parser", lambda p: legacy_body(p, selectors), pages, args.repeat
+    )
+    after = bench(
+        "lxml",
+        lambda p: html_extract.extract_main_text(p, selectors, UNWANTED_SELECTORS),
+        pages,
+        args.repeat,
+    )
+    print(f"  speed-up: {after / before:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""Simulated comparison of the fixed sweep and the adaptive category scheduler.
+
+Categories publish as Poisson processes with a day/night cycle, at rates
+spread from a few articles a day to several an hour. Both schedulers poll
+them over the same simulated days; a poll sees the newest --feed-size
+articles, as an RSS feed does. Reports polls, empty polls, missed articles
+and the delay from publication to fetch. Run from the python/ directory:
+
+    python benchmarks/bench_scheduler.py [--days 7] [--categories 53]
+        [--polls-per-hour 240] [--seed 1]
+"""
+
+import os
+import sys
+import math
+import random
+import argparse
+from bisect import bisect_right
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from adaptive_scheduler import (  # noqa: E402
+    ADAPTIVE_MAX_INTERVAL_MINUTES,
+    ADAPTIVE_TARGET_NEW_PER_POLL,
+    PollPlanner,
+)
+
+HOUR = 3600.0
+# Backlog published before the simulation starts, seen by the first poll.
+HISTORY_SECONDS = 6 * HOUR
+
+
+def publish_times(rate_per_hour: float, end: float, rng: random.Random) -> List[float]:
+    """Poisson arrivals between -HISTORY_SECONDS and `end`, busier by day."""
+    peak = rate_per_hour * 1.8 / HOUR
+    times, t = [], -HISTORY_SECONDS
+    while True:
+        t += rng.expovariate(peak)
+        if t >= end:
+            return times
+        daylight = 1 + 0.8 * math.sin(2 * math.pi * t / (24 * HOUR))
+        if rng.random() < daylight / 1.8:
+            times.append(t)
+
+
+class Feed:
+    def __init__(self, times: List[float], feed_size: int):
+        self.times = times
+        self.feed_size = feed_size
+        self.last_poll = -math.inf
+        self.delays: List[float] = []
+        self.missed = 0
+
+    def poll(self, now: float) -> List[float]:
+        """Returns the new articles a poll at `now` finds."""
+        start = bisect_right(self.times, self.last_poll)
+        end = bisect_right(self.times, now)
+        visible = max(start, end - self.feed_size)
+        if self.last_poll > -math.inf:
+            self.missed += visible - start
+        self.last_poll = now
+        new = self.times[visible:end]
+        self.delays.extend(now - t for t in new)
+        return new
+
+
+def simulate_fixed(
+    feeds: List[Feed], end: float, interval_minutes: float
+) -> Dict[str, Any]:
+    polls = empty = 0
+    now = 0.0
+    while now < end:
+        for feed in feeds:
+            polls += 1
+            empty += not feed.poll(now)
+        now += interval_minutes * 60
+    return {"polls": polls, "empty": empty}
+
+
+def simulate_adaptive(
+    feeds: List[Feed], end: float, polls_per_hour: float, planner: PollPlanner
+) -> Dict[str, Any]:
+    for i in range(len(feeds)):
+        planner.add(("sim", str(i)), 0.0)
+    # The scheduler's token bucket, in simulated time.
+    capacity = tokens = float(len(feeds))
+    refill = polls_per_hour / HOUR
+    polls = empty = 0
+    now = last = 0.0
+    while now < end:
+        tokens = min(capacity, tokens + (now - last) * refill)
+        last = now
+        for key in planner.pop_due(now):
+            if tokens < 1:
+                # The real loop sleeps at least a second between passes.
+                planner.defer(key, now + max(1.0, (1 - tokens) / refill))
+                continue
+            tokens -= 1
+            new = feeds[int(key[1])].poll(now)
+            stamps = [
+                datetime.fromtimestamp(t, timezone.utc) for t in new[:1] + new[-1:]
+            ]
+            planner.record(
+                key,
+                len(new),
+                True,
+                now,
+                min(stamps, default=None),
+                max(stamps, default=None),
+            )
+            polls += 1
+            empty += not new
+        now = planner.next_due()
+    return {"polls": polls, "empty": empty}
+
+
+def report(label: str, result: Dict[str, Any], feeds: List[Feed], days: float):
+    delays = sorted(d for feed in feeds for d in feed.delays)
+    fetched = len(delays)
+    missed = sum(feed.missed for feed in feeds)
+    p95 = delays[int(0.95 * (fetched - 1))] if delays else 0.0
+    print(
+        f"  {label:<9} {result['polls']:>7} {result['polls'] / (days * 24):>8.1f}"
+        f" {100 * result['empty'] / max(1, result['polls']):>7.1f}%"
+        f" {fetched:>8} {missed:>7}"
+        f" {sum(delays) / max(1, fetched) / 60:>9.1f} {p95 / 60:>9.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=float, default=7)
+    parser.add_argument("--categories", type=int, default=53)
+    parser.add_argument("--fixed-interval-minutes", type=float, default=360)
+    parser.add_argument("--polls-per-hour", type=float, default=240)
+    parser.add_argument("--target", type=float, default=ADAPTIVE_TARGET_NEW_PER_POLL)
+    parser.add_argument(
+        "--max-interval-minutes", type=float, default=ADAPTIVE_MAX_INTERVAL_MINUTES
+    )
+    parser.add_argument("--feed-size", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    end = args.days * 24 * HOUR
+    # Log-spaced from ~3 articles a day to 12 an hour.
+    rates = [
+        0.12 * 100 ** (i / max(1, args.categories - 1)) for i in range(args.categories)
+    ]
+    timelines = [publish_times(rate, end, rng) for rate in rates]
+    print(
+        f"{args.categories} categories, {sum(map(len, timelines))} articles over "
+        f"{args.days:g} days, feeds show {args.feed_size} items.\n"
+    )
+    print(
+        f"  {'scheduler':<9} {'polls':>7} {'polls/h':>8} {'empty':>8}"
+        f" {'fetched':>8} {'missed':>7} {'mean min':>9} {'p95 min':>9}"
+    )
+    for label in ("fixed", "adaptive"):
+        feeds = [Feed(times, args.feed_size) for times in timelines]
+        if label == "fixed":
+            result = simulate_fixed(feeds, end, args.fixed_interval_minutes)
+        else:
+            planner = PollPlanner(
+                max_interval=args.max_interval_minutes * 60, target=args.target
+            )
+            result = simulate_adaptive(feeds, end, args.polls_per_hour, planner)
+        report(label, result, feeds, args.days)
+
+
+if __name__ == "__main__":
+    main()
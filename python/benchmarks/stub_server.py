@@ -0,0 +1,161 @@
+"""Local HTTP server that replays the recorded fixtures in benchmarks/fixtures.
+
+Routes:
+    /rss/<slug>.rss     VnExpress RSS feed
+    /api/1/news         NewsData.io response (`category` and `page` parameters)
+    /<slug>.htm         DanTri category page
+
+The same fixture backs every category, so links and IDs are suffixed with
+the category to keep each category's articles distinct.
+"""
+
+import os
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+from urllib.parse import parse_qs, urlparse
+
+import requests
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+# Pages served per NewsData.io category before nextPage becomes null.
+NEWSDATA_PAGES = 5
+
+
+def _read_fixture(name: str) -> bytes:
+    with open(os.path.join(FIXTURES_DIR, name), "rb") as f:
+        return f.read()
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+
+    server: "StubServer"
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        body = self.server.render(url.path, parse_qs(url.query))
+        if self.server.latency:
+            time.sleep(self.server.latency)
+        if body is None:
+            self.send_error(404)
+            return
+        content_type = "application/json" if url.path.startswith("/api/") else None
+        self.send_response(200)
+        self.send_header("Content-Type", content_type or "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency_ms: float = 0.0, port: int = 0):
+        super().__init__(("127.0.0.1", port), FixtureHandler)
+        self.latency = latency_ms / 1000.0
+        self._rss = _read_fixture("vnexpress_tin-moi-nhat.rss")
+        self._dantri = _read_fixture("dantri_category.htm")
+        self._newsdata = json.loads(_read_fixture("newsdata_news.json"))
+        self._rendered: Dict[str, bytes] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def render(self, path: str, query: Dict[str, Any]) -> Optional[bytes]:
+        if path == "/api/1/news":
+            category = query.get("category", ["top"])[0]
+            page = int(query.get("page", ["1"])[0])
+            key = f"{path}?{category}&{page}"
+        else:
+            key = path
+        with self._lock:
+            body = self._rendered.get(key)
+        if body is not None:
+            return body
+
+        if path.startswith("/rss/") and path.endswith(".rss"):
+            slug = path[len("/rss/") : -len(".rss")]
+            body = self._rss.replace(b".html", f"-{slug}.html".encode())
+        elif path == "/api/1/news":
+            body = json.dumps(self._newsdata_for(category, page)).encode()
+        elif path.endswith(".htm") and path.count("/") == 1:
+            slug = path[1 : -len(".htm")]
+            body = self._dantri.replace(b'.htm"', f'-{slug}.htm"'.encode())
+        else:
+            return None
+
+        with self._lock:
+            self._rendered[key] = body
+        return body
+
+    def _newsdata_for(self, category: str, page: int) -> Dict[str, Any]:
+        # A comma-separated query spreads the page over its categories.
+        categories = category.split(",")
+        response = dict(self._newsdata)
+        response["results"] = []
+        for i, article in enumerate(self._newsdata["results"]):
+            suffix = f"{category}-{page}-{i}"
+            response["results"].append(
+                dict(
+                    article,
+                    article_id=f"{article['article_id']}-{suffix}",
+                    link=f"{article['link']}-{suffix}",
+                    category=[categories[i % len(categories)]],
+                )
+            )
+        response["nextPage"] = str(page + 1) if page < NEWSDATA_PAGES else None
+        return response
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(
+            target=self.serve_forever, name="stub-server", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+
+class StubNewsDataClient:
+    """Stands in for NewsDataApiClient, sending news_api() to the stub server."""
+
+    def __init__(self, base_url: str):
+        self.base_url = base_url
+        self.session = requests.Session()
+
+    def news_api(self, **params) -> Dict[str, Any]:
+        response = self.session.get(
+            f"{self.base_url}/api/1/news", params=params, timeout=15
+        )
+        response.raise_for_status()
+        return self.decode(response)
+
+    def decode(self, response: requests.Response) -> Dict[str, Any]:
+        return response.json()
+
+
+if __name__ == "__main__":
+    with StubServer() as server:
+        print(f"Serving fixtures on {server.url} (Ctrl+C to stop)")
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,231 @@
+import os
+import time
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Callable, List, Optional
+
+# Selenium is imported on first use; a process that never needs Chrome
+# (HTTP fetch mode, the web endpoints) does not pay for it.
+if TYPE_CHECKING:
+    from selenium import webdriver
+
+# Each headless Chrome costs roughly 150-300 MB, so keep the pool small on
+# Cloud Run and recycle browsers before their memory footprint grows.
+BROWSER_POOL_SIZE = int(os.getenv("BROWSER_POOL_SIZE", "2"))
+BROWSER_MAX_PAGES = int(os.getenv("BROWSER_MAX_PAGES", "50"))
+# Upper bound on waiting for a page's content selector to appear.
+PAGE_READY_TIMEOUT = float(os.getenv("PAGE_READY_TIMEOUT", "10"))
+
+# Resources Chrome never needs to download for text extraction.
+BLOCKED_URL_PATTERNS = [
+    "*.png",
+    "*.jpg",
+    "*.jpeg",
+    "*.gif",
+    "*.webp",
+    "*.svg",
+    "*.ico",
+    "*.mp4",
+    "*.woff",
+    "*.woff2",
+    "*.ttf",
+    "*.otf",
+    "*doubleclick.net*",
+    "*googlesyndication.com*",
+    "*googletagmanager.com*",
+    "*google-analytics.com*",
+    "*googletagservices.com*",
+    "*facebook.net*",
+    "*adnxs.com*",
+    "*admicro.vn*",
+    "*eclick.vn*",
+]
+
+
+def create_chrome_driver() -> "webdriver.Chrome":
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+
+    logging.info(
+        "Initializing Selenium WebDriver with optimized options for Cloud Run..."
+    )
+    chrome_options = Options()
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--disable-software-rasterizer")
+    chrome_options.add_argument("--disable-extensions")
+    chrome_options.add_argument("--disable-background-networking")
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("--disable-breakpad")
+    chrome_options.add_argument("--disable-client-side-phishing-detection")
+    chrome_options.add_argument("--disable-component-update")
+    chrome_options.add_argument("--disable-default-apps")
+    chrome_options.add_argument("--disable-features=site-per-process,TranslateUI")
+    chrome_options.add_argument("--disable-hang-monitor")
+    chrome_options.add_argument("--disable-ipc-flooding-protection")
+    chrome_options.add_argument("--disable-popup-blocking")
+    chrome_options.add_argument("--disable-prompt-on-repost")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-sync")
+    chrome_options.add_argument("--metrics-recording-only")
+    chrome_options.add_argument("--no-first-run")
+    chrome_options.add_argument("--safebrowsing-disable-auto-update")
+    chrome_options.add_argument("--enable-automation")
+    chrome_options.add_argument("--password-store=basic")
+    chrome_options.add_argument("--use-mock-keychain")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument(
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+    )
+    chrome_options.add_argument("--log-level=3")
+    chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    # Return from driver.get() at DOMContentLoaded instead of the full load.
+    chrome_options.page_load_strategy = "eager"
+
+    chrome_driver_path = os.getenv("CHROME_DRIVER_PATH")
+    if chrome_driver_path and os.path.exists(chrome_driver_path):
+        logging.info(f"Using ChromeDriver from path: {chrome_driver_path}")
+        service = Service(executable_path=chrome_driver_path)
+    else:
+        from webdriver_manager.chrome import ChromeDriverManager
+
+        logging.info("ChromeDriver path not found, using ChromeDriverManager.")
+        service = Service(ChromeDriverManager().install())
+
+    driver = webdriver.Chrome(service=service, options=chrome_options)
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+    except Exception as e:
+        logging.warning(f"Could not enable request blocking: {e}")
+    logging.info("Selenium WebDriver initialized successfully.")
+    return driver
+
+
+class PooledBrowser:
+
+    def __init__(self, driver: "webdriver.Chrome"):
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        self.driver = driver
+        self.wait = WebDriverWait(driver, PAGE_READY_TIMEOUT)
+        self.pages = 0
+        self.created_at = time.monotonic()
+
+    def is_healthy(self) -> bool:
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def quit(self):
+        try:
+            self.driver.quit()
+        except Exception as e:
+            logging.warning(f"Error while closing WebDriver: {e}")
+
+
+class BrowserPool:
+    """Bounded set of long-lived Chrome instances shared across fetch cycles.
+
+    Browsers are started on demand up to `size`, checked before every lease
+    and replaced after `max_pages` page loads or after any error, so a leak
+    or a crashed renderer never outlives a few pages.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], "webdriver.Chrome"] = create_chrome_driver,
+        size: int = BROWSER_POOL_SIZE,
+        max_pages: int = BROWSER_MAX_PAGES,
+    ):
+        self.factory = factory
+        self.size = max(1, size)
+        self.max_pages = max(1, max_pages)
+        self._idle: List[PooledBrowser] = []
+        self._created = 0
+        self._closed = False
+        self._condition = threading.Condition()
+
+    def _take(self) -> Optional[PooledBrowser]:
+        with self._condition:
+            while True:
+                if self._closed:
+                    raise RuntimeError("Browser pool is shut down.")
+                if self._idle:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    return None
+                self._condition.wait()
+
+    def _discard(self, browser: Optional[PooledBrowser]):
+        if browser:
+            browser.quit()
+        with self._condition:
+            self._created -= 1
+            self._condition.notify()
+
+    @contextmanager
+    def acquire(self):
+        browser = self._take()
+        try:
+            if browser and not browser.is_healthy():
+                logging.warning("Discarding unhealthy browser from pool.")
+                browser.quit()
+                browser = None
+            if browser is None:
+                browser = PooledBrowser(self.factory())
+        except Exception:
+            self._discard(None)
+            raise
+
+        try:
+            yield browser
+        except Exception:
+            self._discard(browser)
+            raise
+
+        browser.pages += 1
+        if browser.pages >= self.max_pages:
+            logging.info(f"Recycling browser after {browser.pages} pages.")
+            self._discard(browser)
+            return
+        with self._condition:
+            if self._closed:
+                browser.quit()
+                self._created -= 1
+            else:
+                self._idle.append(browser)
+            self._condition.notify()
+
+    def shutdown(self):
+        with self._condition:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._condition.notify_all()
+        for browser in idle:
+            browser.quit()
+        if idle:
+            logging.info(f"Closed {len(idle)} pooled browsers.")
+
+
+_pool: Optional[BrowserPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_browser_pool() -> BrowserPool:
+    """Process-wide pool, so Chrome start-up is paid once rather than per cycle."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = BrowserPool()
+            atexit.register(_pool.shutdown)
+        return _pool
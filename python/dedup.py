@@ -0,0 +1,199 @@
+import os
+import re
+import hashlib
+import logging
+import operator
+import struct
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# "tag" stores every copy with a shared story_id, "skip" stores only the
+# first copy of a story, "off" disables detection.
+NEAR_DUP_MODE = os.getenv("NEAR_DUP_MODE", "tag").lower()
+# Estimated Jaccard similarity of title+description shingles above which two
+# articles are the same story.
+NEAR_DUP_THRESHOLD = float(os.getenv("NEAR_DUP_THRESHOLD", "0.5"))
+# Signature length and LSH bands; rows per band = permutations / bands. Pairs
+# turn into candidates around a similarity of (1 / bands) ** (1 / rows), so
+# 16 bands of 4 rows put that point at the 0.5 threshold.
+NEAR_DUP_PERMUTATIONS = int(os.getenv("NEAR_DUP_PERMUTATIONS", "64"))
+NEAR_DUP_BANDS = int(os.getenv("NEAR_DUP_BANDS", "16"))
+# Articles kept in the index; older ones can no longer be matched.
+NEAR_DUP_WINDOW = int(os.getenv("NEAR_DUP_WINDOW", "20000"))
+
+# Copies at least this similar to an indexed article are not indexed themselves.
+_NEAR_IDENTICAL = 0.9
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+Signature = Tuple[int, ...]
+
+
+def shingles(text: str, size: int = 2) -> Set[str]:
+    """Word n-grams of the normalised text; single words for very short texts."""
+    words = _WORD_RE.findall(unicodedata.normalize("NFC", text).lower())
+    if len(words) <= size:
+        return {" ".join(words)} if words else set()
+    return {" ".join(words[i : i + size]) for i in range(len(words) - size + 1)}
+
+
+class MinHasher:
+    """MinHash signatures, stable across processes.
+
+    Each shingle's SHAKE-128 digest is read as `permutations` independent
+    32-bit hashes, so one digest per shingle replaces a hash per permutation.
+    """
+
+    def __init__(self, permutations: int = NEAR_DUP_PERMUTATIONS):
+        self.permutations = permutations
+        self._unpack = struct.Struct(f"<{permutations}I").unpack
+
+    def signature(self, items: Iterable[str]) -> Optional[Signature]:
+        size = self.permutations * 4
+        hashes = [
+            self._unpack(hashlib.shake_128(item.encode("utf-8")).digest(size))
+            for item in items
+        ]
+        if not hashes:
+            return None
+        return tuple(map(min, zip(*hashes)))
+
+
+def similarity(a: Signature, b: Signature) -> float:
+    """Estimated Jaccard similarity of the two signatures' shingle sets."""
+    return sum(map(operator.eq, a, b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """LSH index of recent article signatures, clustering them into stories.
+
+    Each signature is split into bands; articles sharing any band hash are
+    candidates and are confirmed by comparing full signatures, so a lookup
+    touches only a handful of articles instead of the whole window. The
+    first article of a story lends its ID as the story_id of later copies.
+    """
+
+    def __init__(
+        self,
+        threshold: float = NEAR_DUP_THRESHOLD,
+        permutations: int = NEAR_DUP_PERMUTATIONS,
+        bands: int = NEAR_DUP_BANDS,
+        window: int = NEAR_DUP_WINDOW,
+    ):
+        if bands <= 0 or permutations % bands:
+            raise ValueError(
+                "NEAR_DUP_PERMUTATIONS must be a multiple of NEAR_DUP_BANDS."
+            )
+        self.threshold = threshold
+        self.bands = bands
+        self.rows = permutations // bands
+        self.window = window
+        self.hasher = MinHasher(permutations)
+        self._lock = threading.Lock()
+        # article_id -> (signature, story_id), oldest first.
+        self._entries: "OrderedDict[str, Tuple[Signature, str]]" = OrderedDict()
+        self._buckets: List[Dict[Signature, Set[str]]] = [{} for _ in range(bands)]
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def signature(self, article: Dict[str, Any]) -> Optional[Signature]:
+        text = f"{article.get('title') or ''} {article.get('description') or ''}"
+        return self.hasher.signature(shingles(text))
+
+    def _bands(self, signature: Signature):
+        for band in range(self.bands):
+            yield band, signature[band * self.rows : (band + 1) * self.rows]
+
+    def _match(
+        self, article_id: str, signature: Signature
+    ) -> Tuple[Optional[str], float]:
+        candidates: Set[str] = set()
+        for band, key in self._bands(signature):
+            candidates |= self._buckets[band].get(key, set())
+        candidates.discard(article_id)
+
+        best_story, best_score = None, 0.0
+        for candidate in candidates:
+            other, story_id = self._entries[candidate]
+            score = similarity(signature, other)
+            if score >= self.threshold and score > best_score:
+                best_story, best_score = story_id, score
+                if score >= _NEAR_IDENTICAL:
+                    break
+        return best_story, best_score
+
+    def _remove(self, article_id: str):
+        signature, _ = self._entries.pop(article_id)
+        for band, key in self._bands(signature):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(article_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def assign(self, article: Dict[str, Any]) -> str:
+        """Indexes the article and returns its story_id (its own ID if new)."""
+        article_id = article["article_id"]
+        signature = self.signature(article)
+        if signature is None:
+            return article_id
+        with self._lock:
+            if article_id in self._entries:
+                return self._entries[article_id][1]
+            story_id, score = self._match(article_id, signature)
+            if story_id is not None and score >= _NEAR_IDENTICAL:
+                # Adds nothing to the story's recall, only to every later lookup.
+                return story_id
+            story_id = story_id or article_id
+            self._add(article_id, signature, story_id)
+            return story_id
+
+    def _add(self, article_id: str, signature: Signature, story_id: str):
+        self._entries[article_id] = (signature, story_id)
+        for band, key in self._bands(signature):
+            self._buckets[band].setdefault(key, set()).add(article_id)
+        while len(self._entries) > self.window:
+            self._remove(next(iter(self._entries)))
+
+    def warm(self, articles: Iterable[Tuple[str, Dict[str, Any]]]) -> int:
+        """Indexes stored (article_id, data) pairs, oldest first, as they were tagged.
+
+        Lets story IDs carry over a restart instead of every story starting
+        afresh. Only an empty index is warmed; returns the articles indexed.
+        """
+        with self._lock:
+            if self._entries:
+                return 0
+            for article_id, data in articles:
+                signature = self.signature(data)
+                if signature is not None and article_id not in self._entries:
+                    self._add(article_id, signature, data.get("story_id") or article_id)
+            return len(self._entries)
+
+    def forget(self, article_ids: Iterable[str]):
+        """Drops articles that were indexed but could not be stored."""
+        with self._lock:
+            for article_id in article_ids:
+                if article_id in self._entries:
+                    self._remove(article_id)
+
+
+_shared_index: Optional[NearDuplicateIndex] = None
+_shared_index_lock = threading.Lock()
+
+
+def get_near_dup_index() -> Optional[NearDuplicateIndex]:
+    """Process-wide index shared by all fetchers; None when disabled."""
+    global _shared_index
+    if NEAR_DUP_MODE not in ("tag", "skip"):
+        return None
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = NearDuplicateIndex()
+            logging.info(
+                f"Near-duplicate detection enabled ({NEAR_DUP_MODE}, threshold "
+                f"{NEAR_DUP_THRESHOLD}, {NEAR_DUP_BANDS} LSH bands)."
+            )
+        return _shared_index
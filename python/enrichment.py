@@ -0,0 +1,149 @@
+import os
+import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from log_context import current_source, set_source
+from rate_limit import HostRateLimiter
+from storage import MAX_BATCH_SIZE
+
+CONTENT_PLACEHOLDER = "CONTENT_TO_BE_SCRAPED"
+
+ENRICH_HOST_INTERVAL = float(os.getenv("ENRICH_HOST_INTERVAL", "0.5"))
+ENRICH_PAGE_SIZE = int(os.getenv("ENRICH_PAGE_SIZE", "100"))
+ENRICH_UPDATE_BATCH_SIZE = min(
+    MAX_BATCH_SIZE, int(os.getenv("ENRICH_UPDATE_BATCH_SIZE", "50"))
+)
+
+
+class ContentEnricher:
+    """Fills in full content for articles stored with CONTENT_PLACEHOLDER.
+
+    Articles are read page by page in ID order and scraped on a bounded
+    worker pool, with a minimum interval between requests to the same host.
+    Updates are written in batches, and the ID of the last fully processed
+    page is saved in the summary collection so that a later run resumes
+    from there. When the backlog is exhausted the cursor is cleared, so
+    articles whose scrape failed are retried on the next pass.
+    """
+
+    def __init__(
+        self,
+        storage,
+        source_id: str,
+        scrape: Callable[[str], str],
+        workers: int = 1,
+        host_interval: float = ENRICH_HOST_INTERVAL,
+        page_size: int = ENRICH_PAGE_SIZE,
+        update_batch_size: int = ENRICH_UPDATE_BATCH_SIZE,
+        should_stop: Callable[[], bool] = lambda: False,
+    ):
+        self.storage = storage
+        self.source_id = source_id
+        self.scrape = scrape
+        self.workers = max(1, workers)
+        self.host_limiter = HostRateLimiter(host_interval)
+        self.page_size = max(1, page_size)
+        self.update_batch_size = max(1, update_batch_size)
+        self.should_stop = should_stop
+        self.cursor_doc_id = f"enrichment_{source_id}"
+
+    def _load_cursor(self) -> Optional[str]:
+        state = self.storage.get_summary(self.cursor_doc_id) or {}
+        return state.get("cursor")
+
+    def _save_cursor(self, cursor: Optional[str]):
+        self.storage.upsert_summary(
+            self.cursor_doc_id,
+            {
+                "cursor": cursor,
+                "source": self.source_id,
+                "updated_at": datetime.now().isoformat(),
+            },
+        )
+
+    def _scrape_one(
+        self, item: Tuple[str, Dict[str, Any]]
+    ) -> Optional[Tuple[str, str]]:
+        article_id, article = item
+        url = article.get("link")
+        if self.should_stop() or not url:
+            return None
+
+        self.host_limiter.wait(url)
+        logging.info(f"Scraping: {article.get('title', article_id)[:60]}...")
+        full_content = self.scrape(url)
+        if full_content and "Content scraping failed" not in full_content:
+            return article_id, full_content
+        return None
+
+    def _flush(self, updates: Dict[str, Dict[str, Any]]) -> int:
+        if not updates:
+            return 0
+        try:
+            self.storage.update_articles(updates)
+            return len(updates)
+        except Exception as e:
+            logging.error(
+                f"Failed to store content for {len(updates)} articles: {e}",
+                exc_info=True,
+            )
+            return 0
+
+    def run(self, limit: int) -> int:
+        start = time.monotonic()
+        cursor = self._load_cursor()
+        if cursor:
+            logging.info(f"Resuming content enrichment after article {cursor}.")
+
+        processed = 0
+        updated = 0
+        exhausted = False
+        with ThreadPoolExecutor(
+            max_workers=self.workers,
+            thread_name_prefix=f"enrich-{self.source_id}",
+            initializer=set_source,
+            initargs=(current_source(),),
+        ) as executor:
+            while processed < limit and not self.should_stop():
+                page = self.storage.query_articles(
+                    {"content": CONTENT_PLACEHOLDER, "source_id": self.source_id},
+                    min(self.page_size, limit - processed),
+                    start_after=cursor,
+                )
+                if not page:
+                    exhausted = True
+                    break
+
+                pending: Dict[str, Dict[str, Any]] = {}
+                for result in executor.map(self._scrape_one, page):
+                    if result is None:
+                        continue
+                    article_id, content = result
+                    pending[article_id] = {
+                        "content": content,
+                        "updated_at": datetime.now().isoformat(),
+                    }
+                    if len(pending) >= self.update_batch_size:
+                        updated += self._flush(pending)
+                        pending = {}
+                updated += self._flush(pending)
+
+                processed += len(page)
+                if self.should_stop():
+                    break
+                cursor = page[-1][0]
+                self._save_cursor(cursor)
+
+        if exhausted:
+            self._save_cursor(None)
+
+        minutes = (time.monotonic() - start) / 60
+        rate = processed / minutes if minutes else 0.0
+        logging.info(
+            f"Content enrichment for {self.source_id}: {updated}/{processed} articles "
+            f"updated in {minutes:.2f} min ({rate:.1f} articles/min)."
+        )
+        return updated
@@ -0,0 +1,91 @@
+import os
+import json
+import logging
+import hashlib
+import threading
+from typing import Dict, Any, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.dirname(__file__), ".cache", "rss_validators.json"
+)
+
+
+class FeedValidatorCache:
+    """Persistent ETag / Last-Modified / content-hash store for RSS feeds.
+
+    Validators from a response are only staged by record(); they become
+    effective after commit(), i.e. once the feed's articles were stored.
+    A failed save therefore never causes the next poll to skip the feed.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("RSS_CACHE_PATH", DEFAULT_CACHE_PATH)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self._entries = json.load(f)
+            logging.info(f"Loaded validators for {len(self._entries)} feeds.")
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not load feed cache from {self.path}: {e}")
+            self._entries = {}
+
+    def save(self):
+        with self._lock:
+            data = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save feed cache to {self.path}: {e}")
+
+    @staticmethod
+    def content_hash(content: bytes) -> str:
+        return hashlib.sha256(content).hexdigest()
+
+    def request_headers(self, url: str) -> Dict[str, str]:
+        with self._lock:
+            entry = self._entries.get(url, {})
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def is_unchanged(self, url: str, content_hash: str) -> bool:
+        with self._lock:
+            return self._entries.get(url, {}).get("hash") == content_hash
+
+    def record(
+        self,
+        url: str,
+        etag: Optional[str],
+        last_modified: Optional[str],
+        content_hash: str,
+    ):
+        with self._lock:
+            self._pending[url] = {
+                "etag": etag,
+                "last_modified": last_modified,
+                "hash": content_hash,
+            }
+
+    def commit(self, url: str):
+        with self._lock:
+            entry = self._pending.pop(url, None)
+            if entry:
+                self._entries[url] = entry
+
+    def discard(self, url: str):
+        with self._lock:
+            self._pending.pop(url, None)
@@ -0,0 +1,103 @@
+import time
+import logging
+import importlib
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from log_context import log_source
+
+# (source_id, module, class, label). Modules are imported when a fetcher is
+# first built, so importing this registry stays cheap.
+FETCHER_SPECS = [
+    ("vnexpress", "rss_fetcher", "RSSFetcher", "VnExpress RSS Fetcher"),
+    ("newsdata_api", "api_fetcher", "APIFetcher", "NewsData.io API Fetcher"),
+    ("dantri", "selenium_fetcher", "SeleniumFetcher", "DanTri Selenium Fetcher"),
+]
+
+
+class FetcherRegistry:
+    """Builds each fetcher once and keeps it, warm, for the life of the process.
+
+    Sessions, API clients, caches and watermarks therefore carry over from one
+    scheduler cycle to the next. A fetcher that fails to build is retried on
+    the next call instead of being dropped.
+    """
+
+    def __init__(self, specs: List[Tuple[str, str, str, str]] = FETCHER_SPECS):
+        self.specs = specs
+        self._instances: Dict[str, Any] = {}
+        # Failed builds per fetcher since its last success.
+        self._failures: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        # Kept apart from _lock so that reading timings never waits for a build.
+        self._import_seconds: Dict[str, float] = {}
+        self._import_lock = threading.Lock()
+
+    def import_seconds(self) -> Dict[str, float]:
+        """Import time of each fetcher module loaded so far."""
+        with self._import_lock:
+            return dict(self._import_seconds)
+
+    def _load_class(self, module_name: str, class_name: str):
+        start = time.perf_counter()
+        module = importlib.import_module(module_name)
+        with self._import_lock:
+            self._import_seconds.setdefault(
+                module_name, round(time.perf_counter() - start, 4)
+            )
+        return getattr(module, class_name)
+
+    def get(self, name: str) -> Optional[Any]:
+        with self._lock:
+            instance = self._instances.get(name)
+            if instance is not None:
+                return instance
+            for spec_name, module_name, class_name, label in self.specs:
+                if spec_name != name:
+                    continue
+                with log_source(name.upper()):
+                    try:
+                        instance = self._load_class(module_name, class_name)()
+                    except Exception as e:
+                        failures = self._failures.get(name, 0) + 1
+                        self._failures[name] = failures
+                        # The cause rarely changes between retries.
+                        if failures == 1:
+                            logging.error(
+                                f"Could not create {label}: {e}", exc_info=True
+                            )
+                        else:
+                            logging.warning(
+                                f"Could not create {label} ({failures} attempts): {e}"
+                            )
+                        return None
+                self._failures.pop(name, None)
+                self._instances[name] = instance
+                return instance
+        raise KeyError(f"Unknown fetcher '{name}'.")
+
+    def fetchers(self) -> List[Tuple[Any, str]]:
+        """(instance, label) of every fetcher that could be built."""
+        fetchers = []
+        for name, _, _, label in self.specs:
+            instance = self.get(name)
+            if instance is not None:
+                fetchers.append((instance, label))
+        return fetchers
+
+    def warm_up(self):
+        for instance, label in self.fetchers():
+            with log_source(instance.log_label):
+                try:
+                    instance.warm_up()
+                except Exception as e:
+                    logging.error(f"Warm-up of {label} failed: {e}", exc_info=True)
+
+    def shutdown(self):
+        with self._lock:
+            instances = list(self._instances.values())
+        for instance in instances:
+            try:
+                instance.shutdown()
+            except Exception as e:
+                logging.warning(f"Error shutting down {instance.source_id}: {e}")
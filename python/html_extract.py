@@ -0,0 +1,116 @@
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    from lxml.etree import ParserError
+except ImportError:  # BeautifulSoup's html.parser is used instead.
+    lxml = None
+
+NO_DESCRIPTION = "No description available."
+# Tags whose strings BeautifulSoup's get_text() leaves out.
+NON_TEXT_TAGS = frozenset({"script", "style", "template", "rt", "rp"})
+
+
+def _joined_text(texts, separator: str) -> str:
+    return separator.join(text.strip() for text in texts if text.strip())
+
+
+def _text_nodes(element, skipped=frozenset()) -> Iterator[str]:
+    """Yields the text nodes under `element`, leaving out `skipped` subtrees.
+
+    Unlike drop_tree(), which glues a removed element's tail onto the text
+    before it, this keeps every tail a separate node, as BeautifulSoup does.
+    Script, style and other NON_TEXT_TAGS contents are left out as well.
+    """
+    if element.text:
+        yield element.text
+    for child in element:
+        # Comments and processing instructions have no string tag.
+        if (
+            isinstance(child.tag, str)
+            and child.tag not in NON_TEXT_TAGS
+            and child not in skipped
+        ):
+            yield from _text_nodes(child, skipped)
+        if child.tail:
+            yield child.tail
+
+
+def extract_text_and_image(description_html: str) -> Tuple[str, Optional[str]]:
+    """Returns the plain text and the first <img> src of an RSS description.
+
+    Both come from a single parse; the text matches BeautifulSoup's
+    get_text(separator=" ", strip=True) with <img> and <br> removed.
+    lxml's HTML parser reads CDATA sections as comments and drops their
+    text, so descriptions that contain one go through BeautifulSoup.
+    """
+    if not description_html or not description_html.strip():
+        return NO_DESCRIPTION, None
+    if lxml is None or "<![CDATA[" in description_html:
+        return _extract_text_and_image_bs4(description_html)
+
+    try:
+        root = lxml.html.fragment_fromstring(description_html, create_parent="div")
+    except (ParserError, ValueError) as e:
+        logging.warning(f"Could not extract clean description text: {e}")
+        return description_html, None
+
+    image = next(root.iter("img"), None)
+    image_url = (image.get("src") or None) if image is not None else None
+    # <img> and <br> hold no text, so only their tails remain.
+    return _joined_text(_text_nodes(root), " ") or NO_DESCRIPTION, image_url
+
+
+def _extract_text_and_image_bs4(description_html: str) -> Tuple[str, Optional[str]]:
+    try:
+        soup = BeautifulSoup(description_html, "html.parser")
+        img_tag = soup.find("img")
+        image_url = img_tag["src"] if img_tag and img_tag.get("src") else None
+        for tag in soup.find_all(["img", "br"]):
+            tag.decompose()
+        return soup.get_text(separator=" ", strip=True) or NO_DESCRIPTION, image_url
+    except Exception as e:
+        logging.warning(f"Could not extract clean description text: {e}")
+        return description_html, None
+
+
+def extract_main_text(
+    page_html: bytes, selectors: List[str], unwanted: List[str]
+) -> Optional[str]:
+    """Returns the text of the first element matching one of `selectors`.
+
+    Elements matching any of the `unwanted` selectors are dropped first.
+    """
+    if lxml is None:
+        return _extract_main_text_bs4(page_html, selectors, unwanted)
+
+    document = lxml.html.fromstring(page_html)
+    for selector in selectors:
+        matches = document.cssselect(selector)
+        if not matches:
+            continue
+        content = matches[0]
+        skipped = {
+            element
+            for unwanted_selector in unwanted
+            for element in content.cssselect(unwanted_selector)
+        }
+        return _joined_text(_text_nodes(content, skipped), "\n")
+    return None
+
+
+def _extract_main_text_bs4(
+    page_html: bytes, selectors: List[str], unwanted: List[str]
+) -> Optional[str]:
+    soup = BeautifulSoup(page_html, "html.parser")
+    for selector in selectors:
+        content = soup.select_one(selector)
+        if content:
+            for unwanted_selector in unwanted:
+                for element in content.select(unwanted_selector):
+                    element.decompose()
+            return content.get_text(separator="\n", strip=True)
+    return None
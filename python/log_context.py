@@ -0,0 +1,55 @@
+import sys
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from typing import Iterator
+
+LOG_FORMAT = "%(asctime)s - %(levelname)s - [%(source)s] - %(message)s"
+
+# Label of the component a log record belongs to. Threads start with the
+# default, so worker pools opt in through set_source() as their initializer.
+_source: "contextvars.ContextVar[str]" = contextvars.ContextVar(
+    "log_source", default="MAIN"
+)
+_configure_lock = threading.Lock()
+
+
+class SourceFilter(logging.Filter):
+    """Adds the current source label to every record as `source`."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.source = _source.get()
+        return True
+
+
+def configure_logging(level: int = logging.INFO):
+    """Installs the process's stdout handler once; later calls are no-ops."""
+    with _configure_lock:
+        root = logging.getLogger()
+        if any(isinstance(f, SourceFilter) for h in root.handlers for f in h.filters):
+            return
+        handler = logging.StreamHandler(sys.stdout)
+        handler.addFilter(SourceFilter())
+        handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        root.addHandler(handler)
+        root.setLevel(level)
+
+
+def current_source() -> str:
+    return _source.get()
+
+
+def set_source(label: str):
+    """Labels everything this thread logs from now on."""
+    _source.set(label)
+
+
+@contextmanager
+def log_source(label: str) -> Iterator[None]:
+    """Labels what is logged inside the with-block, in this thread or task."""
+    token = _source.set(label)
+    try:
+        yield
+    finally:
+        _source.reset(token)
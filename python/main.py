@@ -1,42 +1,105 @@
+import time
+
+# Taken before the other imports so the startup report covers them.
+IMPORT_STARTED = time.perf_counter()
+
+import os
 import threading
+import atexit
 import logging
-import time
 import schedule
-from datetime import datetime
-from flask import Flask
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from flask import Flask, Response, jsonify
 
-from api_fetcher import APIFetcher
-from rss_fetcher import RSSFetcher
-from selenium_fetcher import SeleniumFetcher
+from adaptive_scheduler import SCHEDULER_MODE, AdaptiveScheduler
+from fetcher_registry import FetcherRegistry
+from log_context import configure_logging
+from metrics import REGISTRY
 
 app = Flask(__name__)
 
+FETCH_MODE = os.getenv("FETCH_MODE", "concurrent")
+MAX_CONCURRENT_FETCHERS = int(os.getenv("MAX_CONCURRENT_FETCHERS", "3"))
+FETCHER_TIMEOUT_SECONDS = int(os.getenv("FETCHER_TIMEOUT_SECONDS", "3600"))
+FETCH_INTERVAL_MINUTES = int(os.getenv("FETCH_INTERVAL_MINUTES", "360"))
+# Extra time a fetcher gets to react to a stop request before it is abandoned.
+FETCHER_STOP_GRACE_SECONDS = 120
+
+# Fetchers are built by the background warm-up, not when gunicorn loads this
+# module, and then reused by every scheduled cycle.
+FETCHERS = FetcherRegistry()
+atexit.register(FETCHERS.shutdown)
+
+STARTED_AT = datetime.now()
+STARTUP: Dict[str, Any] = {
+    "app_import_seconds": round(time.perf_counter() - IMPORT_STARTED, 4),
+    "warmup_seconds": None,
+    "ready": False,
+}
+_startup_lock = threading.Lock()
+
 
 @app.route("/")
 def health():
     return "OK", 200
 
 
-def setup_logging():
-    for handler in logging.root.handlers[:]:
-        logging.root.removeHandler(handler)
-
-    logging.basicConfig(
-        level=logging.INFO,
-        format="%(asctime)s - %(levelname)s - [MAIN] - %(message)s",
-        handlers=[logging.StreamHandler()],
+@app.route("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), mimetype="text/plain; version=0.0.4")
+
+
+@app.route("/status")
+def status():
+    # Copies, since the warm-up thread may still be filling both in.
+    with _startup_lock:
+        startup = dict(STARTUP)
+    startup["module_import_seconds"] = FETCHERS.import_seconds()
+    return jsonify(
+        {
+            "started_at": STARTED_AT.isoformat(),
+            "uptime_seconds": round((datetime.now() - STARTED_AT).total_seconds()),
+            "fetch_mode": FETCH_MODE,
+            "fetch_interval_minutes": FETCH_INTERVAL_MINUTES,
+            "scheduler_mode": SCHEDULER_MODE,
+            "startup": startup,
+            "categories": ADAPTIVE_SCHEDULER.snapshot() if ADAPTIVE_SCHEDULER else None,
+            "metrics": REGISTRY.snapshot(),
+        }
     )
 
 
-def safe_run(fetcher_instance, name):
+def safe_run(
+    fetcher_instance, name, categories: Optional[List[str]] = None
+) -> timedelta:
+    start_time = datetime.now()
     try:
-        start_time = datetime.now()
         logging.info(f"--- Starting fetch process for: {name} ---")
-        fetcher_instance.run()
+        fetcher_instance.run(categories)
         duration = datetime.now() - start_time
         logging.info(f"--- Completed fetch process for: {name} in {duration} ---")
     except Exception as e:
         logging.error(f"--- Critical error in {name}: {e} ---", exc_info=True)
+    return datetime.now() - start_time
+
+
+def warm_up():
+    """Builds and warms the fetchers in the background after the app is serving."""
+    start = time.perf_counter()
+    FETCHERS.warm_up()
+    with _startup_lock:
+        STARTUP["warmup_seconds"] = round(time.perf_counter() - start, 4)
+        STARTUP["ready"] = True
+    breakdown = ", ".join(
+        f"{name} {seconds * 1000:.0f} ms"
+        for name, seconds in FETCHERS.import_seconds().items()
+    )
+    logging.info(
+        f"Startup: app imported in {STARTUP['app_import_seconds'] * 1000:.0f} ms, "
+        f"warm-up took {STARTUP['warmup_seconds'] * 1000:.0f} ms ({breakdown})."
+    )
 
 
 def run_all_fetchers_sequential():
@@ -45,14 +108,79 @@ def run_all_fetchers_sequential():
     logging.info("=" * 60)
     start_time = datetime.now()
 
-    fetchers_to_run = [
-        (RSSFetcher(), "VnExpress RSS Fetcher"),
-        (APIFetcher(), "NewsData.io API Fetcher"),
-        (SeleniumFetcher(), "DanTri Selenium Fetcher"),
+    for instance, name in FETCHERS.fetchers():
+        safe_run(instance, name)
+
+    total_duration = datetime.now() - start_time
+    logging.info("ALL FETCHERS COMPLETED!")
+    logging.info(f"Total execution time: {total_duration}")
+    logging.info("=" * 60)
+
+
+def _run_with_timeout(
+    fetcher_instance, name, timeout: int, categories: Optional[List[str]] = None
+) -> timedelta:
+    def on_timeout():
+        logging.error(
+            f"--- {name} exceeded its {timeout}s timeout, requesting stop ---"
+        )
+        fetcher_instance.request_stop()
+
+    timer = threading.Timer(timeout, on_timeout)
+    timer.daemon = True
+    timer.start()
+    try:
+        return safe_run(fetcher_instance, name, categories)
+    finally:
+        timer.cancel()
+
+
+def _poll_categories(fetcher_instance, name, categories: List[str]) -> timedelta:
+    return _run_with_timeout(
+        fetcher_instance, name, FETCHER_TIMEOUT_SECONDS, categories
+    )
+
+
+ADAPTIVE_SCHEDULER = (
+    AdaptiveScheduler(FETCHERS.fetchers, _poll_categories, MAX_CONCURRENT_FETCHERS)
+    if SCHEDULER_MODE == "adaptive"
+    else None
+)
+
+
+def run_all_fetchers_concurrent():
+    logging.info("=" * 60)
+    logging.info("STARTING SCHEDULED FETCH PROCESS (CONCURRENT)")
+    logging.info("=" * 60)
+    start_time = datetime.now()
+
+    fetchers_to_run = FETCHERS.fetchers()
+    max_workers = max(1, min(MAX_CONCURRENT_FETCHERS, len(fetchers_to_run)))
+    # Fetchers beyond the pool size queue up, so the overall deadline has to
+    # cover every "wave" of fetchers plus the stop grace period.
+    waves = -(-len(fetchers_to_run) // max_workers)
+    overall_timeout = waves * FETCHER_TIMEOUT_SECONDS + FETCHER_STOP_GRACE_SECONDS
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetcher")
+    futures = [
+        (
+            instance,
+            name,
+            executor.submit(_run_with_timeout, instance, name, FETCHER_TIMEOUT_SECONDS),
+        )
+        for instance, name in fetchers_to_run
     ]
+    wait([future for _, _, future in futures], timeout=overall_timeout)
 
-    for instance, name in fetchers_to_run:
-        safe_run(instance, name)
+    for instance, name, future in futures:
+        if not future.done():
+            instance.request_stop()
+            future.cancel()
+            logging.error(f"--- {name} did not finish in time and was abandoned ---")
+            continue
+        logging.info(f"{name} took {future.result()}")
+
+    executor.shutdown(wait=False, cancel_futures=True)
 
     total_duration = datetime.now() - start_time
     logging.info("ALL FETCHERS COMPLETED!")
@@ -60,15 +188,25 @@ def run_all_fetchers_sequential():
     logging.info("=" * 60)
 
 
+def run_all_fetchers():
+    if FETCH_MODE == "sequential":
+        run_all_fetchers_sequential()
+    else:
+        run_all_fetchers_concurrent()
+
+
 def run_scheduler():
-    setup_logging()
+    warm_up()
+    if ADAPTIVE_SCHEDULER is not None:
+        ADAPTIVE_SCHEDULER.run_forever()
+        return
 
-    schedule.every(6).hours.do(run_all_fetchers_sequential)
+    schedule.every(FETCH_INTERVAL_MINUTES).minutes.do(run_all_fetchers)
 
     logging.info("Starting news fetcher scheduler...")
-    logging.info("Scheduled to run every 6 hours.")
+    logging.info(f"Scheduled to run every {FETCH_INTERVAL_MINUTES} minutes.")
 
-    run_all_fetchers_sequential()
+    run_all_fetchers()
 
     while True:
         try:
@@ -80,7 +218,7 @@ def run_scheduler():
 
 
 def main():
-    setup_logging()
+    configure_logging()
     logging.info("Initializing application...")
 
     scheduler_thread = threading.Thread(target=run_scheduler, daemon=True)
@@ -0,0 +1,290 @@
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Seconds; covers a cache hit up to a slow page load or Firestore commit.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+LabelValues = Tuple[str, ...]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], **extra) -> str:
+    pairs = list(zip(names, values)) + list(extra.items())
+    if not pairs:
+        return ""
+    escaped = (
+        str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        for _, value in pairs
+    )
+    return "{" + ",".join(f'{n}="{v}"' for (n, _), v in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric '{self.name}' expects labels {self.labelnames}, "
+                f"got {tuple(labels)}."
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+
+
+class Counter(_Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}{labels} {_format_value(value)}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {"labels": dict(zip(self.labelnames, key)), "value": value}
+                for key, value in sorted(self._values.items())
+            ]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+
+class _HistogramSeries:
+    __slots__ = ("bucket_counts", "count", "sum", "max")
+
+    def __init__(self, size: int):
+        self.bucket_counts = [0] * size
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+
+class Histogram(_Metric):
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[LabelValues, _HistogramSeries] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _HistogramSeries(len(self.buckets))
+            if index < len(self.buckets):
+                series.bucket_counts[index] += 1
+            series.count += 1
+            series.sum += value
+            series.max = max(series.max, value)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observes the wall-clock duration of the with-block, even if it raises."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def render(self) -> List[str]:
+        lines = super().render()
+        with self._lock:
+            for key, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series.bucket_counts):
+                    cumulative += count
+                    labels = _format_labels(
+                        self.labelnames, key, le=_format_value(bound)
+                    )
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.labelnames, key, le="+Inf")
+                lines.append(f"{self.name}_bucket{labels} {series.count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_sum{labels} {_format_value(series.sum)}")
+                lines.append(f"{self.name}_count{labels} {series.count}")
+        return lines
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "labels": dict(zip(self.labelnames, key)),
+                    "count": series.count,
+                    "sum": round(series.sum, 6),
+                    "mean": round(series.sum / series.count, 6),
+                    "max": round(series.max, 6),
+                }
+                for key, series in sorted(self._series.items())
+                if series.count
+            ]
+
+
+class MetricsRegistry:
+    """Process-wide set of metrics, rendered for Prometheus or as JSON."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name: str, help: str, labelnames, **kwargs) -> Any:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif type(metric) is not cls or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"Metric '{name}' is already registered differently.")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Optional[Sequence[float]] = None,
+    ) -> Histogram:
+        return self._register(
+            Histogram, name, help, labelnames, buckets=buckets or DEFAULT_BUCKETS
+        )
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            metrics = sorted(self._metrics.values(), key=lambda m: m.name)
+        return {
+            metric.name: {"type": metric.type, "samples": metric.snapshot()}
+            for metric in metrics
+        }
+
+
+REGISTRY = MetricsRegistry()
+
+CATEGORY_FETCH_SECONDS = REGISTRY.histogram(
+    "genews_category_fetch_seconds",
+    "Time to download and parse one category.",
+    ["source", "category"],
+)
+PARSE_SECONDS = REGISTRY.histogram(
+    "genews_parse_seconds", "Time spent parsing feeds and pages.", ["source"]
+)
+FETCH_RUN_SECONDS = REGISTRY.histogram(
+    "genews_fetch_run_seconds",
+    "Duration of a complete fetcher run.",
+    ["source"],
+    buckets=(1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+LAST_RUN_TIMESTAMP = REGISTRY.gauge(
+    "genews_last_run_timestamp_seconds",
+    "Unix time at which the last fetcher run finished.",
+    ["source"],
+)
+LAST_RUN_SAVED = REGISTRY.gauge(
+    "genews_last_run_articles_saved", "Articles saved by the last run.", ["source"]
+)
+BYTES_DOWNLOADED = REGISTRY.counter(
+    "genews_bytes_downloaded_total", "Response bytes downloaded.", ["source"]
+)
+ARTICLES = REGISTRY.counter(
+    "genews_articles_total",
+    "Articles handed to storage, by result (saved, skipped, failed).",
+    ["source", "result"],
+)
+NEAR_DUPLICATES = REGISTRY.counter(
+    "genews_near_duplicates_total",
+    "New articles matched to a story already in the near-duplicate index.",
+    ["source"],
+)
+SEEN_CACHE_HITS = REGISTRY.counter(
+    "genews_seen_cache_hits_total",
+    "Article IDs answered by the seen-ID cache without a storage read.",
+    ["source"],
+)
+STORAGE_SECONDS = REGISTRY.histogram(
+    "genews_storage_operation_seconds",
+    "Latency of storage calls.",
+    ["backend", "operation"],
+)
+STORAGE_DOCUMENTS = REGISTRY.counter(
+    "genews_storage_documents_total",
+    "Documents read or written by storage calls.",
+    ["backend", "operation"],
+)
+STORAGE_ERRORS = REGISTRY.counter(
+    "genews_storage_errors_total",
+    "Storage calls that raised.",
+    ["backend", "operation"],
+)
+CATEGORY_POLLS = REGISTRY.counter(
+    "genews_category_polls_total",
+    "Category polls by the adaptive scheduler, by outcome (new, empty, failed).",
+    ["source", "outcome"],
+)
+CATEGORY_POLL_INTERVAL = REGISTRY.gauge(
+    "genews_category_poll_interval_seconds",
+    "Current polling interval the adaptive scheduler uses for a category.",
+    ["source", "category"],
+)
@@ -0,0 +1,96 @@
+"""Rewrites stored articles in the compact (version 2) or full (version 1) schema.
+
+Compacting needs the source documents, which a fetcher stores on its first
+run with ARTICLE_SCHEMA=compact; articles of sources without one only lose
+the copied description. Run from the python/ directory:
+
+    python migrate_schema.py --to compact [--source vnexpress] [--dry-run]
+    python migrate_schema.py --to full
+"""
+
+import os
+import json
+import logging
+import argparse
+from typing import Any, Dict, List, Optional
+
+from dotenv import load_dotenv
+
+from article import COMPACT_SCHEMA_VERSION, compact_document, expand_document
+from storage import MAX_BATCH_SIZE, StorageBackend, create_storage
+
+
+def _size(document: Dict[str, Any]) -> int:
+    return len(json.dumps(document, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def migrate(
+    storage: StorageBackend,
+    target: str,
+    source_id: Optional[str] = None,
+    dry_run: bool = False,
+    start_after: Optional[str] = None,
+) -> Dict[str, int]:
+    """Converts every matching article; returns counts and bytes before/after."""
+    sources = storage.get_sources()
+    filters = {"source_id": source_id} if source_id else {}
+    stats = {"scanned": 0, "rewritten": 0, "bytes_before": 0, "bytes_after": 0}
+    cursor = start_after
+
+    while True:
+        page = storage.query_articles(filters, MAX_BATCH_SIZE, start_after=cursor)
+        if not page:
+            break
+        rewritten: List[Dict[str, Any]] = []
+        for article_id, document in page:
+            if target == "compact":
+                if document.get("schema_version") == COMPACT_SCHEMA_VERSION:
+                    converted = document
+                else:
+                    converted = compact_document(
+                        document, sources.get(document.get("source_id"))
+                    )
+            else:
+                converted = expand_document(document, sources)
+            converted.setdefault("article_id", article_id)
+            stats["scanned"] += 1
+            stats["bytes_before"] += _size(document)
+            stats["bytes_after"] += _size(converted)
+            if converted != document:
+                rewritten.append(converted)
+
+        if rewritten and not dry_run:
+            storage.insert_articles(rewritten)
+        stats["rewritten"] += len(rewritten)
+        cursor = page[-1][0]
+        logging.info(f"Migrated {stats['scanned']} articles so far, last ID {cursor}.")
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--to", choices=["compact", "full"], required=True)
+    parser.add_argument("--source", help="Only migrate articles of this source_id.")
+    parser.add_argument("--start-after", metavar="ID", help="Resume after this ID.")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Report sizes without writing."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(message)s")
+    load_dotenv(os.path.join(os.path.dirname(__file__), "..", ".env"))
+    storage = create_storage(
+        os.getenv("ARTICLES_COLLECTION", "articles"),
+        os.getenv("NEWS_COLLECTION", "news_data"),
+    )
+
+    stats = migrate(storage, args.to, args.source, args.dry_run, args.start_after)
+    logging.info(
+        f"{'Would rewrite' if args.dry_run else 'Rewrote'} {stats['rewritten']} of "
+        f"{stats['scanned']} articles; {stats['bytes_before']} -> "
+        f"{stats['bytes_after']} bytes."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import os
+import time
+import queue
+import logging
+import threading
+import contextvars
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from storage import MAX_BATCH_SIZE
+
+WRITE_QUEUE_SIZE = int(os.getenv("WRITE_QUEUE_SIZE", "1000"))
+WRITE_FLUSH_SECONDS = float(os.getenv("WRITE_FLUSH_SECONDS", "2"))
+
+_CLOSE = object()
+
+WriteBatchFn = Callable[[List[Dict[str, Any]], str], Tuple[List[str], List[str]]]
+
+
+class ArticleWriter:
+    """Writer stage of the fetch pipeline.
+
+    Fetchers submit() articles into a bounded queue while a background thread
+    groups them into batches of up to MAX_BATCH_SIZE and hands them to
+    write_batch. A batch is flushed when it is full or WRITE_FLUSH_SECONDS
+    after its first article arrived. submit() blocks while the queue is full,
+    which throttles fetchers to the write rate and keeps memory bounded.
+    """
+
+    def __init__(
+        self,
+        write_batch: WriteBatchFn,
+        on_close: Optional[Callable[[], None]] = None,
+        batch_size: int = MAX_BATCH_SIZE,
+        queue_size: Optional[int] = None,
+        flush_seconds: Optional[float] = None,
+    ):
+        self._write_batch = write_batch
+        self._on_close = on_close
+        self.batch_size = batch_size
+        self.flush_seconds = (
+            WRITE_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        )
+        self._queue: "queue.Queue" = queue.Queue(maxsize=queue_size or WRITE_QUEUE_SIZE)
+        self.saved_by_category: Dict[str, int] = defaultdict(int)
+        self.skipped_by_category: Dict[str, int] = defaultdict(int)
+        # IDs write_batch skipped as already stored (or as copies of a story).
+        self.skipped_ids: Set[str] = set()
+        self.failed_count = 0
+        self._closed = False
+        # Runs in a copy of the caller's context to keep its log source label.
+        self._thread = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(self._run,),
+            name="article-writer",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def __enter__(self) -> "ArticleWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def total_saved(self) -> int:
+        return sum(self.saved_by_category.values())
+
+    @property
+    def total_skipped(self) -> int:
+        return sum(self.skipped_by_category.values())
+
+    def submit(self, article: Dict[str, Any], category_name: str):
+        if self._closed:
+            raise RuntimeError("Cannot submit to a closed ArticleWriter.")
+        self._queue.put((article, category_name))
+
+    def submit_many(self, articles: List[Dict[str, Any]], category_name: str):
+        for article in articles:
+            self.submit(article, category_name)
+
+    def close(self) -> Tuple[int, int]:
+        """Flushes pending articles, stops the writer and returns (saved, skipped)."""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(_CLOSE)
+            self._thread.join()
+            if self._on_close:
+                self._on_close()
+        return self.total_saved, self.total_skipped
+
+    def _run(self):
+        pending: List[Tuple[Dict[str, Any], str]] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._flush(pending)
+                pending = []
+                continue
+
+            if item is _CLOSE:
+                self._flush(pending)
+                return
+
+            if not pending:
+                deadline = time.monotonic() + self.flush_seconds
+            pending.append(item)
+            if len(pending) >= self.batch_size:
+                self._flush(pending)
+                pending = []
+
+    def _flush(self, pending: List[Tuple[Dict[str, Any], str]]):
+        if not pending:
+            return
+
+        # The same article can arrive from several categories; write it once.
+        articles = []
+        category_by_id: Dict[str, str] = {}
+        for article, category_name in pending:
+            article_id = article.get("article_id")
+            if article_id in category_by_id:
+                self.skipped_by_category[category_name] += 1
+                continue
+            if article_id:
+                category_by_id[article_id] = category_name
+            articles.append(article)
+
+        categories = sorted(set(category_by_id.values()))
+        label = (
+            categories[0] if len(categories) == 1 else f"{len(categories)} categories"
+        )
+        try:
+            saved_ids, skipped_ids = self._write_batch(articles, label)
+        except Exception as e:
+            self.failed_count += len(articles)
+            logging.error(
+                f"Writer failed to store batch for '{label}': {e}", exc_info=True
+            )
+            return
+
+        for article_id in saved_ids:
+            self.saved_by_category[category_by_id[article_id]] += 1
+        for article_id in skipped_ids:
+            self.skipped_by_category[category_by_id[article_id]] += 1
+        self.skipped_ids.update(skipped_ids)
+        # write_batch logs and drops articles it could not store instead of
+        # raising, so whatever it neither saved nor skipped failed.
+        accounted = set(saved_ids) | set(skipped_ids)
+        self.failed_count += sum(
+            1 for article_id in category_by_id if article_id not in accounted
+        )
@@ -0,0 +1,99 @@
+import time
+import threading
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` tokens per second, bursts up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float = None):
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(1.0, rate))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated) * self.rate
+        )
+        self._updated = now
+
+    def set_rate(self, rate: float, capacity: float = None):
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = float(rate)
+            if capacity is not None:
+                self.capacity = float(capacity)
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Takes tokens if available; otherwise returns the seconds to wait."""
+        with self._lock:
+            self._refill(time.monotonic())
+            # Requests larger than the bucket only wait for a full bucket.
+            tokens = min(tokens, self.capacity)
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0):
+        while True:
+            wait = self.try_acquire(tokens)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+
+class AdaptiveTokenBucket(TokenBucket):
+    """Token bucket that halves its rate when throttled and recovers on success.
+
+    throttled() also pushes the bucket into debt, so every caller waits out
+    the server's Retry-After (or one token interval) before the next request.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float = None,
+        min_rate: Optional[float] = None,
+        recovery: float = 1.25,
+    ):
+        super().__init__(rate, capacity)
+        self.max_rate = self.rate
+        self.min_rate = min_rate if min_rate is not None else self.rate / 16
+        self.recovery = recovery
+
+    def throttled(self, retry_after: Optional[float] = None) -> float:
+        """Backs off after a 429; returns the seconds until the next token."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = max(self.min_rate, self.rate / 2)
+            pause = retry_after if retry_after is not None else 1.0 / self.rate
+            self._tokens = min(self._tokens, 0.0) - pause * self.rate
+            return (1.0 - self._tokens) / self.rate
+
+    def succeeded(self):
+        with self._lock:
+            if self.rate < self.max_rate:
+                self._refill(time.monotonic())
+                self.rate = min(self.max_rate, self.rate * self.recovery)
+
+
+class HostRateLimiter:
+    """Enforces a minimum interval between requests to the same host."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def wait(self, url: str):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
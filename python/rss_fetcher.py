@@ -1,13 +1,18 @@
+import os
 import feedparser
 import requests
 import logging
-import time
 import argparse
-from bs4 import BeautifulSoup
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 
-from base_fetcher import BaseFetcher
+from article import Article
+from base_fetcher import EnrichingFetcher
+from feed_cache import FeedValidatorCache
+from html_extract import extract_main_text, extract_text_and_image
+from log_context import current_source, set_source
 
 VNEXPRESS_CONFIG = {
     "source_id": "vnexpress",
@@ -49,16 +54,29 @@ VNEXPRESS_CONFIG = {
     },
 }
 
+# Number of feeds downloaded at the same time. This is also the cap on
+# concurrent connections to vnexpress.net; 1 restores the sequential mode.
+RSS_MAX_WORKERS = int(os.getenv("RSS_MAX_WORKERS", "4"))
 
-class RSSFetcher(BaseFetcher):
+# Stripped from the article body before its text is taken.
+UNWANTED_SELECTORS = ["script", "style", "figure", ".ads"]
+
+
+class RSSFetcher(EnrichingFetcher):
 
     def __init__(self):
         super().__init__(source_id=VNEXPRESS_CONFIG["source_id"])
         self.config = VNEXPRESS_CONFIG
+        self.max_workers = max(1, RSS_MAX_WORKERS)
+        self.content_workers = self.max_workers
+        self.feed_cache = FeedValidatorCache()
         self._init_session()
 
     def _init_session(self):
         self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.session.headers.update(
             {
                 "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
@@ -66,81 +84,115 @@ class RSSFetcher(BaseFetcher):
         )
         logging.info("Requests session initialized.")
 
-    def _extract_image_from_description(self, description: str) -> Optional[str]:
+    def shutdown(self):
+        super().shutdown()
+        self.feed_cache.save()
+        self.session.close()
+
+    @staticmethod
+    def _parse_published(date_string: str) -> Optional[datetime]:
         try:
-            soup = BeautifulSoup(description, "html.parser")
-            img_tag = soup.find("img")
-            return img_tag["src"] if img_tag and img_tag.get("src") else None
-        except Exception:
+            # Format: "Sun, 22 Jun 2025 22:07:14 +0700"
+            return datetime.strptime(date_string, "%a, %d %b %Y %H:%M:%S %z")
+        except (ValueError, TypeError):
             return None
 
-    def _extract_description_text(self, description: str) -> str:
+    @staticmethod
+    def _parse_published_iso(date_string: str) -> Optional[datetime]:
         try:
-            soup = BeautifulSoup(description, "html.parser")
-            for tag in soup.find_all(["img", "br"]):
-                tag.decompose()
-            return (
-                soup.get_text(separator=" ", strip=True) or "No description available."
-            )
-        except Exception as e:
-            logging.warning(f"Could not extract clean description text: {e}")
-            return description
+            return datetime.fromisoformat(date_string)
+        except (ValueError, TypeError):
+            return None
 
     def _parse_rss_date(self, date_string: str) -> str:
-        try:
-            # Format: "Sun, 22 Jun 2025 22:07:14 +0700"
-            dt = datetime.strptime(date_string, "%a, %d %b %Y %H:%M:%S %z")
-            return dt.isoformat()
-        except (ValueError, TypeError):
+        published = self._parse_published(date_string)
+        if published is None:
             logging.warning(
                 f"Could not parse date '{date_string}', using current time."
             )
             return datetime.now().isoformat()
+        return published.isoformat()
 
     def _parse_rss_entry(
         self, entry: Dict[str, Any], category_name: str
-    ) -> Optional[Dict[str, Any]]:
+    ) -> Optional[Article]:
         link = entry.get("link")
         if not link:
             logging.warning(f"Skipping entry with no link: {entry.get('title')}")
             return None
 
         title = entry.get("title", "No Title")
-        description_html = entry.get("description", "")
-        description_text = self._extract_description_text(description_html)
+        description_text, image_url = extract_text_and_image(
+            entry.get("description", "")
+        )
         now = datetime.now().isoformat()
 
+        return Article(
+            article_id=self._generate_article_id(link),
+            title=title,
+            link=link,
+            creator=self.config["creator"],
+            video_url=None,
+            description=description_text,
+            content=description_text,
+            pubDate=self._parse_rss_date(entry.get("published")),
+            image_url=image_url,
+            source_id=self.config["source_id"],
+            source_name=self.config["source_name"],
+            source_url=self.config["base_url"],
+            source_icon=self.config["favicon"],
+            language=self.config["language"],
+            country=self.config["country"],
+            category=[category_name],
+            ai_tag="RSS_PARSED",
+            created_at=now,
+            updated_at=now,
+        )
+
+    def source_metadata(self) -> Optional[Dict[str, Any]]:
         return {
-            "article_id": self._generate_article_id(link),
-            "title": title,
-            "link": link,
-            "creator": self.config["creator"],
-            "video_url": None,
-            "description": description_text,
-            "content": description_text,
-            "pubDate": self._parse_rss_date(entry.get("published")),
-            "image_url": self._extract_image_from_description(description_html),
             "source_id": self.config["source_id"],
             "source_name": self.config["source_name"],
             "source_url": self.config["base_url"],
             "source_icon": self.config["favicon"],
+            "creator": self.config["creator"],
             "language": self.config["language"],
             "country": self.config["country"],
-            "category": [category_name],
-            "ai_tag": "RSS_PARSED",
-            "created_at": now,
-            "updated_at": now,
         }
 
+    def _rss_url(self, category_slug: str) -> str:
+        if category_slug == "trang-chu":
+            return f"{self.config['base_url']}/rss/tin-moi-nhat.rss"
+        return f"{self.config['base_rss_url']}/{category_slug}.rss"
+
     def fetch_rss_category(
         self, category_slug: str, category_name: str
     ) -> List[Dict[str, Any]]:
-        rss_url = f"{self.config['base_rss_url']}/{category_slug}.rss"
-        if category_slug == "trang-chu":
-            rss_url = f"{self.config['base_url']}/rss/tin-moi-nhat.rss"
+        rss_url = self._rss_url(category_slug)
 
         logging.info(f"Fetching RSS from: {rss_url}")
-        feed = feedparser.parse(rss_url)
+        response = self.session.get(
+            rss_url, timeout=15, headers=self.feed_cache.request_headers(rss_url)
+        )
+        if response.status_code == 304:
+            logging.info(f"Feed for '{category_name}' not modified (304).")
+            return []
+        response.raise_for_status()
+        self.record_download(len(response.content))
+
+        content_hash = self.feed_cache.content_hash(response.content)
+        if self.feed_cache.is_unchanged(rss_url, content_hash):
+            logging.info(f"Feed for '{category_name}' unchanged since last run.")
+            return []
+        self.feed_cache.record(
+            rss_url,
+            response.headers.get("ETag"),
+            response.headers.get("Last-Modified"),
+            content_hash,
+        )
+
+        with self.parse_timer():
+            feed = feedparser.parse(response.content)
 
         if feed.bozo:
             logging.warning(
@@ -154,39 +206,168 @@ class RSSFetcher(BaseFetcher):
         logging.info(f"Found {len(feed.entries)} articles in '{category_name}'.")
 
         articles = []
+        older = 0
         for entry in feed.entries:
             try:
+                # Checked per entry: feeds such as tin-xem-nhieu are ordered by
+                # popularity, so newer items can follow an old one.
+                published = self._parse_published(entry.get("published"))
+                if self.watermarks.is_older(category_slug, published):
+                    older += 1
+                    continue
+                link = entry.get("link")
+                if link and self.watermarks.seen(
+                    category_slug, self._generate_article_id(link)
+                ):
+                    continue
+
                 parsed_article = self._parse_rss_entry(entry, category_name)
                 if parsed_article:
                     articles.append(parsed_article)
+                    self.watermarks.observe(
+                        category_slug, parsed_article["article_id"], published
+                    )
             except Exception as e:
                 logging.error(
                     f"Error processing an article in '{category_name}': {e}",
                     exc_info=True,
                 )
+        if older:
+            logging.info(
+                f"Skipped {older} entries of '{category_name}' older than its "
+                f"watermark."
+            )
         return articles
 
-    def fetch_all(self) -> bool:
-        total_saved = 0
-        total_skipped = 0
-        successful_categories = []
-
-        categories = self.config["categories"]
+    def _fetch_category(self, category_slug: str, category_name: str):
+        with self.category_timer(category_name):
+            return self.fetch_rss_category(category_slug, category_name)
+
+    def _fetch_categories_parallel(self, categories: Dict[str, str]):
+        """Download and parse feeds concurrently, yielding results in category order."""
+        with ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="rss",
+            initializer=set_source,
+            initargs=(current_source(),),
+        ) as executor:
+            futures = [
+                (slug, name, executor.submit(self._fetch_category, slug, name))
+                for slug, name in categories.items()
+            ]
+            for slug, name, future in futures:
+                if self.should_stop():
+                    for _, _, pending in futures:
+                        pending.cancel()
+                    return
+                try:
+                    yield slug, name, future.result(), None
+                except Exception as e:
+                    yield slug, name, [], e
+
+    def _fetch_categories_sequential(self, categories: Dict[str, str]):
         for i, (slug, name) in enumerate(categories.items(), 1):
-            logging.info(f"--- Processing category {i}/{len(categories)}: {name} ---")
+            if i > 1 and not self._sleep(1):
+                return
             try:
-                articles = self.fetch_rss_category(slug, name)
-                if articles:
-                    saved, skipped = self.save_articles_to_firestore(articles, name)
-                    if saved > 0:
-                        successful_categories.append(name)
-                    total_saved += saved
-                    total_skipped += skipped
-                time.sleep(1)
+                yield slug, name, self._fetch_category(slug, name), None
             except Exception as e:
+                yield slug, name, [], e
+
+    def _merge_into(
+        self, unique_articles: Dict[str, Dict[str, Any]], articles: List[Dict[str, Any]]
+    ) -> None:
+        for article in articles:
+            existing = unique_articles.get(article["article_id"])
+            if existing is None:
+                unique_articles[article["article_id"]] = article
+                continue
+            for category in article["category"]:
+                if category not in existing["category"]:
+                    existing["category"].append(category)
+
+    def category_keys(self) -> List[str]:
+        return list(self.config["categories"])
+
+    def fetch_all(self, categories: Optional[List[str]] = None) -> bool:
+        feeds = {
+            slug: name
+            for slug, name in self.config["categories"].items()
+            if categories is None or slug in categories
+        }
+        if self.max_workers > 1:
+            logging.info(
+                f"Fetching {len(feeds)} feeds with {self.max_workers} workers."
+            )
+            results = self._fetch_categories_parallel(feeds)
+        else:
+            results = self._fetch_categories_sequential(feeds)
+
+        # Several feeds carry the same article, so collect every feed first and
+        # store each unique article once with all of its categories.
+        unique_articles: Dict[str, Dict[str, Any]] = {}
+        listed_by_slug: Dict[str, List[Tuple[str, Optional[datetime]]]] = {}
+        fetched_urls = []
+        categories_with_entries = []
+        total_entries = 0
+        for i, (slug, name, articles, error) in enumerate(results, 1):
+            if self.should_stop():
+                logging.warning("Stop requested, skipping remaining categories.")
+                break
+            logging.info(f"--- Processing category {i}/{len(feeds)}: {name} ---")
+            rss_url = self._rss_url(slug)
+            if error:
+                self.feed_cache.discard(rss_url)
                 logging.error(
-                    f"Failed to process category '{name}': {e}", exc_info=True
+                    f"Failed to process category '{name}': {error}",
+                    exc_info=error,
                 )
+                self.record_category(slug, [], ok=False)
+                continue
+            listed_by_slug[slug] = [
+                (a["article_id"], self._parse_published_iso(a["pubDate"]))
+                for a in articles
+            ]
+            fetched_urls.append(rss_url)
+            if articles and name not in categories_with_entries:
+                categories_with_entries.append(name)
+            total_entries += len(articles)
+            self._merge_into(unique_articles, articles)
+
+        logging.info(
+            f"Collected {total_entries} entries, {len(unique_articles)} unique articles."
+        )
+
+        # Each article is credited to the first feed that listed it, the feed
+        # that stored it back when every feed was saved on its own.
+        with self.open_writer() as writer:
+            for article in unique_articles.values():
+                writer.submit(article, article["category"][0])
+        total_saved, total_skipped = writer.total_saved, writer.total_skipped
+        for slug, listed in listed_by_slug.items():
+            self.record_category(slug, listed, writer.skipped_ids)
+        for name in categories_with_entries:
+            logging.info(
+                f"Category '{name}': Saved {writer.saved_by_category.get(name, 0)} "
+                f"new, skipped {writer.skipped_by_category.get(name, 0)} existing "
+                f"articles."
+            )
+        successful_categories = [
+            name
+            for name in categories_with_entries
+            if writer.saved_by_category.get(name)
+        ]
+
+        # Only remember feed versions and watermarks once every article is stored.
+        all_stored = writer.failed_count == 0
+        # Entries of categories skipped by a stop were observed but never saved.
+        self.settle_watermarks(all_stored and not self.should_stop())
+        for rss_url in fetched_urls:
+            if all_stored:
+                self.feed_cache.commit(rss_url)
+            else:
+                self.feed_cache.discard(rss_url)
+        self.feed_cache.save()
 
         self.update_summary_document(
             total_saved=total_saved,
@@ -200,16 +381,12 @@ class RSSFetcher(BaseFetcher):
         try:
             response = self.session.get(url, timeout=15)
             response.raise_for_status()
-            soup = BeautifulSoup(response.content, "html.parser")
-
-            for selector in self.config["content_selectors"]:
-                content_div = soup.select_one(selector)
-                if content_div:
-                    for unwanted in content_div.find_all(
-                        ["script", "style", ".ads", "figure"]
-                    ):
-                        unwanted.decompose()
-                    return content_div.get_text(separator="\n", strip=True)
+            self.record_download(len(response.content))
+            content = extract_main_text(
+                response.content, self.config["content_selectors"], UNWANTED_SELECTORS
+            )
+            if content is not None:
+                return content
 
             return "Content not found with available selectors."
         except requests.exceptions.RequestException as e:
@@ -219,43 +396,6 @@ class RSSFetcher(BaseFetcher):
             logging.error(f"Error scraping content from {url}: {e}")
             return "Content scraping failed."
 
-    def scrape_content_for_existing_articles(self, limit: int = 10):
-        logging.info(f"Starting to scrape full content for up to {limit} articles.")
-        try:
-            docs = (
-                self.db.collection(self.articles_collection)
-                .where("content", "==", "CONTENT_TO_BE_SCRAPED")
-                .where("source_id", "==", self.source_id)
-                .limit(limit)
-                .stream()
-            )
-
-            updated_count = 0
-            for doc in docs:
-                article = doc.to_dict()
-                url = article.get("link")
-                if not url:
-                    continue
-
-                logging.info(f"Scraping: {article.get('title', doc.id)[:60]}...")
-                full_content = self.scrape_full_article_content(url)
-
-                if full_content and "Content scraping failed" not in full_content:
-                    doc.reference.update(
-                        {
-                            "content": full_content,
-                            "updated_at": datetime.now().isoformat(),
-                        }
-                    )
-                    updated_count += 1
-                    time.sleep(2)  # Be respectful
-
-            logging.info(f"Updated content for {updated_count} articles.")
-        except Exception as e:
-            logging.error(
-                "An error occurred during content scraping batch.", exc_info=True
-            )
-
 
 def main():
     parser = argparse.ArgumentParser(description="Fetch news from VnExpress RSS feeds.")
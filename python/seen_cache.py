@@ -0,0 +1,170 @@
+import os
+import json
+import math
+import time
+import logging
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Iterable, List, Optional
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(__file__), ".cache", "seen_ids.json")
+
+
+class BloomFilter:
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        self.capacity = max(1, capacity)
+        self.size = max(
+            8, int(-self.capacity * math.log(error_rate) / (math.log(2) ** 2))
+        )
+        self.hash_count = max(1, int(round(self.size / self.capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key: str):
+        digest = hashlib.md5(key.encode("utf-8")).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, key: str):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key: str) -> bool:
+        return all(
+            self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key)
+        )
+
+
+class SeenIdCache:
+    """Recently stored article IDs, consulted before the remote existence check.
+
+    The LRU holds the authoritative (id -> last seen) entries and is bounded
+    both by size and by age. The Bloom filter mirrors the LRU and answers the
+    common "never seen" case without touching it; since a Bloom filter can
+    give false positives, only an LRU hit is treated as "already stored".
+    """
+
+    def __init__(
+        self,
+        max_size: int = 50000,
+        max_age_seconds: float = 72 * 3600,
+        path: Optional[str] = None,
+    ):
+        self.max_size = max_size
+        self.max_age_seconds = max_age_seconds
+        self.path = path
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+        self._evictions = 0
+        self._bloom = BloomFilter(self.max_size)
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _rebuild_bloom(self):
+        self._bloom = BloomFilter(self.max_size)
+        for article_id in self._entries:
+            self._bloom.add(article_id)
+        self._evictions = 0
+
+    def _evict(self, now: float):
+        cutoff = now - self.max_age_seconds
+        while self._entries:
+            oldest_id, seen_at = next(iter(self._entries.items()))
+            if len(self._entries) <= self.max_size and seen_at >= cutoff:
+                break
+            del self._entries[oldest_id]
+            self._evictions += 1
+        # Evicted IDs stay set in the Bloom filter; rebuild before it saturates.
+        if self._evictions > self.max_size // 2:
+            self._rebuild_bloom()
+
+    def contains(self, article_id: str) -> bool:
+        with self._lock:
+            if article_id not in self._bloom:
+                self.misses += 1
+                return False
+            now = time.time()
+            seen_at = self._entries.get(article_id)
+            if seen_at is None or seen_at < now - self.max_age_seconds:
+                self.misses += 1
+                return False
+            self._entries[article_id] = now
+            self._entries.move_to_end(article_id)
+            self.hits += 1
+            return True
+
+    def filter_unknown(self, article_ids: Iterable[str]) -> List[str]:
+        return [
+            article_id for article_id in article_ids if not self.contains(article_id)
+        ]
+
+    def add_many(self, article_ids: Iterable[str], seen_at: Optional[float] = None):
+        now = time.time()
+        seen_at = seen_at or now
+        with self._lock:
+            for article_id in article_ids:
+                if article_id in self._entries:
+                    self._entries.move_to_end(article_id)
+                else:
+                    self._bloom.add(article_id)
+                self._entries[article_id] = seen_at
+            self._evict(now)
+
+    def load(self) -> int:
+        if not self.path or not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Could not load seen-ID cache from {self.path}: {e}")
+            return 0
+        with self._lock:
+            for article_id, seen_at in sorted(data.items(), key=lambda kv: kv[1]):
+                self._entries[article_id] = seen_at
+            self._evict(time.time())
+            self._rebuild_bloom()
+            return len(self._entries)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = dict(self._entries)
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.warning(f"Could not save seen-ID cache to {self.path}: {e}")
+
+
+_shared_cache: Optional[SeenIdCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def get_seen_cache() -> Optional[SeenIdCache]:
+    """Process-wide cache shared by all fetchers; None when disabled."""
+    global _shared_cache
+    if os.getenv("SEEN_CACHE_ENABLED", "true").lower() not in ("1", "true", "yes"):
+        return None
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            path = os.getenv("SEEN_CACHE_PATH", DEFAULT_CACHE_PATH) or None
+            _shared_cache = SeenIdCache(
+                max_size=int(os.getenv("SEEN_CACHE_SIZE", "50000")),
+                max_age_seconds=float(os.getenv("SEEN_CACHE_MAX_AGE_HOURS", "72"))
+                * 3600,
+                path=path,
+            )
+            loaded = _shared_cache.load()
+            logging.info(f"Seen-ID cache warmed with {loaded} IDs from disk.")
+        return _shared_cache
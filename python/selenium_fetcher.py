@@ -1,20 +1,59 @@
 import os
 import time
 import logging
+import threading
+import requests
+import lxml.html
 from datetime import datetime
-from typing import List, Dict, Any, Optional
-
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from webdriver_manager.chrome import ChromeDriverManager
-
-from base_fetcher import BaseFetcher
-
-
-class SeleniumFetcher(BaseFetcher):
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from requests.adapters import HTTPAdapter
+
+from article import Article
+from base_fetcher import EnrichingFetcher
+from browser_pool import BROWSER_POOL_SIZE, PooledBrowser, get_browser_pool
+from log_context import current_source, set_source
+
+# "http" parses category pages from plain HTTP responses and only starts Chrome
+# when a page yields no articles; "browser" always uses Chrome.
+DANTRI_FETCH_MODE = os.getenv("DANTRI_FETCH_MODE", "http")
+# Minimum gap between two requests to dantri.com.vn, shared by every fetch path.
+DANTRI_REQUEST_INTERVAL = float(os.getenv("DANTRI_REQUEST_INTERVAL", "1.0"))
+# Categories / articles processed at the same time; browser work is further
+# bounded by the browser pool size.
+DANTRI_MAX_WORKERS = int(os.getenv("DANTRI_MAX_WORKERS", str(BROWSER_POOL_SIZE)))
+
+CONTENT_SELECTORS = [".singular-content", ".article-content", "div.e-magazine__body"]
+
+EXTRACT_ARTICLES_JS = """
+return Array.from(document.querySelectorAll("article.article-item")).map(function (el) {
+    var link = el.querySelector(".article-title a");
+    var excerpt = el.querySelector(".article-excerpt");
+    var img = el.querySelector(".article-thumb img");
+    return {
+        title: link ? link.innerText : "",
+        href: link ? link.href : null,
+        excerpt: excerpt ? excerpt.innerText.trim() : "",
+        image: img ? img.getAttribute("data-src") || img.src : null
+    };
+});
+"""
+
+EXTRACT_CONTENT_JS = """
+var selectors = arguments[0], unwanted = arguments[1];
+for (var i = 0; i < selectors.length; i++) {
+    var el = document.querySelector(selectors[i]);
+    if (!el) continue;
+    unwanted.forEach(function (sel) {
+        el.querySelectorAll(sel).forEach(function (node) { node.remove(); });
+    });
+    return el.innerText;
+}
+return null;
+"""
+
+
+class SeleniumFetcher(EnrichingFetcher):
 
     BASE_URL = "https://dantri.com.vn"
     SOURCE_CONFIG = {
@@ -48,74 +87,55 @@ class SeleniumFetcher(BaseFetcher):
 
     def __init__(self):
         super().__init__(source_id=self.SOURCE_CONFIG["source_id"])
-        self.driver = None
-        self.wait = None
+        self.browser_pool = get_browser_pool()
+        self.max_workers = max(1, DANTRI_MAX_WORKERS)
+        self.content_workers = self.max_workers
+        self.fetch_mode = DANTRI_FETCH_MODE
+        self.request_interval = DANTRI_REQUEST_INTERVAL
+        self._last_request_at = 0.0
+        self._politeness_lock = threading.Lock()
+        self._init_session()
+
+    def _init_session(self):
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(
+            {
+                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
+            }
+        )
+        logging.info("Requests session initialized.")
 
-    def _init_selenium(self):
-        if self.driver:
-            logging.info("Selenium WebDriver is already initialized.")
-            return
+    def shutdown(self):
+        super().shutdown()
+        self.session.close()
 
-        logging.info(
-            "Initializing Selenium WebDriver with optimized options for Cloud Run..."
-        )
-        chrome_options = Options()
-        chrome_options.add_argument("--headless=new")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-software-rasterizer")
-        chrome_options.add_argument("--disable-extensions")
-        chrome_options.add_argument("--disable-background-networking")
-        chrome_options.add_argument("--disable-background-timer-throttling")
-        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
-        chrome_options.add_argument("--disable-breakpad")
-        chrome_options.add_argument("--disable-client-side-phishing-detection")
-        chrome_options.add_argument("--disable-component-update")
-        chrome_options.add_argument("--disable-default-apps")
-        chrome_options.add_argument("--disable-features=site-per-process,TranslateUI")
-        chrome_options.add_argument("--disable-hang-monitor")
-        chrome_options.add_argument("--disable-ipc-flooding-protection")
-        chrome_options.add_argument("--disable-popup-blocking")
-        chrome_options.add_argument("--disable-prompt-on-repost")
-        chrome_options.add_argument("--disable-renderer-backgrounding")
-        chrome_options.add_argument("--disable-sync")
-        chrome_options.add_argument("--metrics-recording-only")
-        chrome_options.add_argument("--no-first-run")
-        chrome_options.add_argument("--safebrowsing-disable-auto-update")
-        chrome_options.add_argument("--enable-automation")
-        chrome_options.add_argument("--password-store=basic")
-        chrome_options.add_argument("--use-mock-keychain")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--remote-debugging-port=9222")
-        chrome_options.add_argument(
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/114.0.0.0 Safari/537.36"
-        )
-        chrome_options.add_argument("--log-level=3")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-logging"])
+    def _wait_for_politeness(self):
+        """Blocks until request_interval has passed since the previous request."""
+        with self._politeness_lock:
+            wait = self._last_request_at + self.request_interval - time.monotonic()
+            if wait > 0:
+                self._sleep(wait)
+            self._last_request_at = time.monotonic()
 
-        try:
-            chrome_driver_path = os.getenv("CHROME_DRIVER_PATH")
-            if chrome_driver_path and os.path.exists(chrome_driver_path):
-                logging.info(f"Using ChromeDriver from path: {chrome_driver_path}")
-                service = Service(executable_path=chrome_driver_path)
-            else:
-                logging.info("ChromeDriver path not found, using ChromeDriverManager.")
-                service = Service(ChromeDriverManager().install())
+    def _wait_for_selector(self, browser: PooledBrowser, selector: str) -> bool:
+        from selenium.common.exceptions import TimeoutException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
 
-            self.driver = webdriver.Chrome(service=service, options=chrome_options)
-            self.wait = WebDriverWait(self.driver, 10)
-            logging.info("Selenium WebDriver initialized successfully.")
-        except Exception as e:
-            logging.error(f"Error initializing Selenium: {e}", exc_info=True)
-            raise
+        try:
+            browser.wait.until(
+                EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+            )
+            return True
+        except TimeoutException:
+            logging.warning(f"Timed out waiting for '{selector}'.")
+            return False
 
-    def _close_selenium(self):
-        if self.driver:
-            self.driver.quit()
-            self.driver = None
-            self.wait = None
-            logging.info("Selenium WebDriver closed.")
+    def source_metadata(self) -> Optional[Dict[str, Any]]:
+        return dict(self.SOURCE_CONFIG)
 
     def _extract_full_url(self, relative_url: str) -> str:
         if relative_url.startswith("http"):
@@ -134,39 +154,121 @@ class SeleniumFetcher(BaseFetcher):
         description: str,
         image_url: Optional[str],
         category_name: str,
-    ) -> Dict[str, Any]:
+    ) -> Article:
         now = datetime.now().isoformat()
         full_link = self._extract_full_url(link)
 
-        return {
-            "article_id": self._generate_article_id(full_link),
-            "title": title.strip(),
-            "link": full_link,
-            "creator": self.SOURCE_CONFIG["creator"],
-            "video_url": None,
-            "description": (
+        return Article(
+            article_id=self._generate_article_id(full_link),
+            title=title.strip(),
+            link=full_link,
+            creator=self.SOURCE_CONFIG["creator"],
+            video_url=None,
+            description=(
                 description.strip()
                 if description
                 else title.strip() or "No description available."
             ),
-            "content": (
+            content=(
                 description.strip()
                 if description
                 else title.strip() or "No description available."
             ),
-            "pubDate": now,
-            "image_url": self._extract_full_url(image_url) if image_url else None,
-            "source_id": self.SOURCE_CONFIG["source_id"],
-            "source_name": self.SOURCE_CONFIG["source_name"],
-            "source_url": self.SOURCE_CONFIG["source_url"],
-            "source_icon": self.SOURCE_CONFIG["source_icon"],
-            "language": self.SOURCE_CONFIG["language"],
-            "country": self.SOURCE_CONFIG["country"],
-            "category": [category_name],
-            "ai_tag": "SELENIUM_SCRAPED",
-            "created_at": now,
-            "updated_at": now,
-        }
+            pubDate=now,
+            image_url=self._extract_full_url(image_url) if image_url else None,
+            source_id=self.SOURCE_CONFIG["source_id"],
+            source_name=self.SOURCE_CONFIG["source_name"],
+            source_url=self.SOURCE_CONFIG["source_url"],
+            source_icon=self.SOURCE_CONFIG["source_icon"],
+            language=self.SOURCE_CONFIG["language"],
+            country=self.SOURCE_CONFIG["country"],
+            category=[category_name],
+            ai_tag="SELENIUM_SCRAPED",
+            created_at=now,
+            updated_at=now,
+        )
+
+    @staticmethod
+    def _first(element, selector: str):
+        matches = element.cssselect(selector)
+        return matches[0] if matches else None
+
+    @staticmethod
+    def _clean_text(element) -> str:
+        return " ".join(element.text_content().split()) if element is not None else ""
+
+    def fetch_category_articles_http(
+        self, category_slug: str, category_name: str
+    ) -> List[Dict[str, Any]]:
+        category_url = f"{self.BASE_URL}/{category_slug}.htm"
+        logging.info(f"Fetching articles over HTTP from: {category_url}")
+
+        try:
+            self._wait_for_politeness()
+            response = self.session.get(category_url, timeout=15)
+            response.raise_for_status()
+            self.record_download(len(response.content))
+            with self.parse_timer():
+                document = lxml.html.fromstring(response.content)
+        except Exception as e:
+            logging.warning(f"HTTP fetch failed for category '{category_name}': {e}")
+            return []
+
+        articles = []
+        for element in document.cssselect("article.article-item"):
+            title_element = self._first(element, ".article-title a")
+            if title_element is None:
+                continue
+            title = self._clean_text(title_element)
+            link = title_element.get("href")
+            description = self._clean_text(self._first(element, ".article-excerpt"))
+
+            image_url = None
+            thumb_element = self._first(element, ".article-thumb img")
+            if thumb_element is not None:
+                image_url = thumb_element.get("data-src") or thumb_element.get("src")
+
+            if title and link:
+                articles.append(
+                    self._create_article_dict(
+                        title, link, description, image_url, category_name
+                    )
+                )
+
+        logging.info(
+            f"Extracted {len(articles)} articles from '{category_name}' over HTTP"
+        )
+        return articles
+
+    def fetch_category(
+        self, category_slug: str, category_name: str
+    ) -> List[Dict[str, Any]]:
+        articles = None
+        if self.fetch_mode == "http":
+            articles = self.fetch_category_articles_http(category_slug, category_name)
+            if not articles:
+                logging.info(f"Falling back to Chrome for category '{category_name}'.")
+        if not articles:
+            articles = self.fetch_category_articles(category_slug, category_name)
+        return self._drop_seen(category_slug, articles)
+
+    def _drop_seen(
+        self, category_slug: str, articles: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        # Category pages carry no publication time, so the watermark is the
+        # set of recently stored IDs.
+        new_articles = []
+        for article in articles:
+            if self.watermarks.seen(category_slug, article["article_id"]):
+                continue
+            self.watermarks.observe(category_slug, article["article_id"], None)
+            new_articles.append(article)
+        if len(new_articles) < len(articles):
+            logging.info(
+                f"Skipped {len(articles) - len(new_articles)} articles of "
+                f"'{category_slug}' already seen by earlier runs."
+            )
+        return new_articles
 
     def fetch_category_articles(
         self, category_slug: str, category_name: str
@@ -175,63 +277,36 @@ class SeleniumFetcher(BaseFetcher):
         logging.info(f"Fetching articles from: {category_url}")
 
         try:
-            self.driver.get(category_url)
-            time.sleep(3)
+            with self.browser_pool.acquire() as browser:
+                self._wait_for_politeness()
+                browser.driver.get(category_url)
+                self._wait_for_selector(browser, "article.article-item")
 
-            article_elements = self.driver.find_elements(
-                By.CSS_SELECTOR, "article.article-item"
-            )
+                # One round-trip for the whole page instead of several per element.
+                items = browser.driver.execute_script(EXTRACT_ARTICLES_JS) or []
 
-            if not article_elements:
+            if not items:
                 logging.warning(
                     f"No article items found for category '{category_name}' at {category_url}"
                 )
                 return []
 
-            logging.info(
-                f"Found {len(article_elements)} potential articles in '{category_name}'"
-            )
+            logging.info(f"Found {len(items)} potential articles in '{category_name}'")
             articles = []
 
-            for element in article_elements:
-                try:
-                    title_element = element.find_element(
-                        By.CSS_SELECTOR, ".article-title a"
-                    )
-                    title = title_element.text.strip()
-                    link = title_element.get_attribute("href")
-
-                    description = ""
-                    try:
-                        desc_element = element.find_element(
-                            By.CSS_SELECTOR, ".article-excerpt"
-                        )
-                        description = desc_element.text.strip()
-                    except:
-                        pass
-
-                    image_url = None
-                    try:
-                        thumb_element = element.find_element(
-                            By.CSS_SELECTOR, ".article-thumb img"
+            for item in items:
+                title = (item.get("title") or "").strip()
+                link = item.get("href")
+                if title and link:
+                    articles.append(
+                        self._create_article_dict(
+                            title,
+                            link,
+                            item.get("excerpt") or "",
+                            item.get("image"),
+                            category_name,
                         )
-                        image_url = thumb_element.get_attribute(
-                            "data-src"
-                        ) or thumb_element.get_attribute("src")
-                    except:
-                        pass
-
-                    if title and link:
-                        article = self._create_article_dict(
-                            title, link, description, image_url, category_name
-                        )
-                        articles.append(article)
-
-                except Exception as e:
-                    logging.warning(
-                        f"Could not extract data from an article element: {e}"
                     )
-                    continue
 
             logging.info(
                 f"Successfully extracted {len(articles)} articles from '{category_name}'"
@@ -244,39 +319,63 @@ class SeleniumFetcher(BaseFetcher):
             )
             return []
 
-    def fetch_all(self) -> bool:
+    def category_keys(self) -> List[str]:
+        return list(self.CATEGORIES)
+
+    def fetch_all(self, categories: Optional[List[str]] = None) -> bool:
+        failed_categories = []
+        listed_by_slug: Dict[str, List[Tuple[str, Optional[datetime]]]] = {}
+        categories = [
+            (slug, name)
+            for slug, name in self.CATEGORIES.items()
+            if categories is None or slug in categories
+        ]
+
+        def process(index: int, slug: str, name: str):
+            if self.should_stop():
+                return
+            logging.info(
+                f"--- Processing category {index}/{len(categories)}: {name} ---"
+            )
+            with self.category_timer(name):
+                articles = self.fetch_category(slug, name)
+            # Category pages carry no publication time.
+            listed_by_slug[slug] = [(a["article_id"], None) for a in articles]
+            if articles:
+                writer.submit_many(articles, name)
+            else:
+                failed_categories.append(name)
+
         try:
-            self._init_selenium()
-            total_saved = 0
-            total_skipped = 0
-            successful_categories = []
-            failed_categories = []
-
-            for i, (slug, name) in enumerate(self.CATEGORIES.items(), 1):
-                logging.info(
-                    f"--- Processing category {i}/{len(self.CATEGORIES)}: {name} ---"
-                )
-                articles = self.fetch_category_articles(slug, name)
-                if articles:
-                    saved, skipped = self.save_articles_to_firestore(articles, name)
-                    if saved > 0:
-                        successful_categories.append(name)
-                    total_saved += saved
-                    total_skipped += skipped
-                else:
-                    failed_categories.append(name)
-
-                if i < len(self.CATEGORIES):
-                    logging.info("Waiting 5 seconds before next category...")
-                    time.sleep(5)
+            with self.open_writer() as writer, ThreadPoolExecutor(
+                max_workers=self.max_workers,
+                thread_name_prefix="dantri",
+                initializer=set_source,
+                initargs=(current_source(),),
+            ) as executor:
+                futures = [
+                    executor.submit(process, i, slug, name)
+                    for i, (slug, name) in enumerate(categories, 1)
+                ]
+                for future in futures:
+                    future.result()
+            if self.should_stop():
+                logging.warning("Stop requested, remaining categories were skipped.")
         except Exception as e:
             logging.critical(
                 f"A critical error occurred in fetch_all: {e}", exc_info=True
             )
             self.update_summary_document(0, 0, [], "selenium_scrape", status="failed")
             return False
-        finally:
-            self._close_selenium()
+        self.settle_watermarks(writer.failed_count == 0)
+        for slug, listed in listed_by_slug.items():
+            self.record_category(slug, listed, writer.skipped_ids)
+
+        total_saved = writer.total_saved
+        total_skipped = writer.total_skipped
+        successful_categories = [
+            name for _, name in categories if writer.saved_by_category.get(name, 0) > 0
+        ]
 
         self.update_summary_document(
             total_saved=total_saved,
@@ -300,34 +399,16 @@ class SeleniumFetcher(BaseFetcher):
 
     def scrape_full_article_content(self, url: str) -> str:
         try:
-            self.driver.get(url)
-            time.sleep(3)
-
-            content_selectors = [
-                ".singular-content",
-                ".article-content",
-                "div.e-magazine__body",
-            ]
-
-            for selector in content_selectors:
-                try:
-                    content_element = self.driver.find_element(
-                        By.CSS_SELECTOR, selector
-                    )
-                    if content_element:
-                        for unwanted_selector in [".ads", "script", "style"]:
-                            try:
-                                for el in content_element.find_elements(
-                                    By.CSS_SELECTOR, unwanted_selector
-                                ):
-                                    self.driver.execute_script(
-                                        "arguments[0].remove()", el
-                                    )
-                            except:
-                                pass
-                        return content_element.text.strip()
-                except:
-                    continue
+            with self.browser_pool.acquire() as browser:
+                self._wait_for_politeness()
+                browser.driver.get(url)
+                self._wait_for_selector(browser, ", ".join(CONTENT_SELECTORS))
+
+                content = browser.driver.execute_script(
+                    EXTRACT_CONTENT_JS, CONTENT_SELECTORS, [".ads", "script", "style"]
+                )
+            if content:
+                return content.strip()
 
             return "Content not found with available selectors."
 
@@ -335,48 +416,6 @@ class SeleniumFetcher(BaseFetcher):
             logging.error(f"Error scraping content from {url}: {e}")
             return "Content scraping failed."
 
-    def scrape_content_for_existing_articles(self, limit: int = 10):
-        logging.info(f"Starting to scrape full content for up to {limit} articles.")
-
-        try:
-            self._init_selenium()
-            docs = (
-                self.db.collection(self.articles_collection)
-                .where("content", "==", "CONTENT_TO_BE_SCRAPED")
-                .where("source_id", "==", self.source_id)
-                .limit(limit)
-                .stream()
-            )
-
-            updated_count = 0
-            for doc in docs:
-                article = doc.to_dict()
-                url = article.get("link")
-                if not url:
-                    continue
-
-                logging.info(f"Scraping: {article.get('title', doc.id)[:60]}...")
-                full_content = self.scrape_full_article_content(url)
-
-                if full_content and "Content scraping failed" not in full_content:
-                    doc.reference.update(
-                        {
-                            "content": full_content,
-                            "updated_at": datetime.now().isoformat(),
-                        }
-                    )
-                    updated_count += 1
-                    time.sleep(3)
-
-            logging.info(f"Updated content for {updated_count} articles.")
-
-        except Exception as e:
-            logging.error(
-                "An error occurred during content scraping batch.", exc_info=True
-            )
-        finally:
-            self._close_selenium()
-
 
 def main():
     fetcher = SeleniumFetcher()
@@ -0,0 +1,631 @@
+import os
+import json
+import sqlite3
+import logging
+import functools
+import threading
+from abc import ABC, abstractmethod
+from typing import List, Dict, Any, Optional, Set, Tuple
+
+from metrics import STORAGE_DOCUMENTS, STORAGE_ERRORS, STORAGE_SECONDS
+from write_engine import (
+    WRITE_INITIAL_OPS_PER_SECOND,
+    WRITE_MAX_ATTEMPTS,
+    WRITE_MAX_OPS_PER_SECOND,
+    ParallelBatchCommitter,
+    WriteResult,
+)
+
+# Firestore batch write limit; every backend enforces it so that local runs
+# exercise the same batch sizes as production.
+MAX_BATCH_SIZE = 500
+
+DEFAULT_SQLITE_PATH = os.path.join(os.path.dirname(__file__), ".cache", "genews.db")
+# One document per source with the constants compact articles leave out. The
+# app reads this collection under a fixed name to expand compact articles
+# (_sourcesCollectionName in firestore_news_repository.dart), so it is not
+# configurable; renaming it means changing both.
+SOURCES_COLLECTION = "sources"
+
+
+def instrumented(operation: str):
+    """Records latency and document count of a storage call under `operation`.
+
+    Reads are counted by the documents returned for queries and by the IDs
+    asked for otherwise; writes by the documents passed in.
+    """
+
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, docs, *args, **kwargs):
+            labels = {"backend": self.backend_name, "operation": operation}
+            try:
+                with STORAGE_SECONDS.time(**labels):
+                    result = method(self, docs, *args, **kwargs)
+            except Exception:
+                STORAGE_ERRORS.inc(**labels)
+                raise
+            STORAGE_DOCUMENTS.inc(
+                len(result) if isinstance(result, list) else len(docs), **labels
+            )
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+class StorageBackend(ABC):
+
+    backend_name = ""
+
+    def __init__(self, articles_collection: str, summary_collection: str):
+        self.articles_collection = articles_collection
+        self.summary_collection = summary_collection
+        self.sources_collection = SOURCES_COLLECTION
+        self._committer: Optional[ParallelBatchCommitter] = None
+        self._committer_lock = threading.Lock()
+
+    @abstractmethod
+    def existing_ids(self, article_ids: List[str]) -> Set[str]:
+        pass
+
+    @abstractmethod
+    def insert_articles(self, articles: List[Dict[str, Any]]) -> None:
+        """Atomically writes up to MAX_BATCH_SIZE articles keyed by article_id."""
+        pass
+
+    @abstractmethod
+    def update_article(self, article_id: str, fields: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def update_articles(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        """Atomically applies up to MAX_BATCH_SIZE partial updates keyed by ID."""
+        pass
+
+    @abstractmethod
+    def upsert_summary(
+        self, doc_id: str, data: Dict[str, Any], merge: bool = False
+    ) -> None:
+        """Writes a summary document; with merge, only the top-level fields in data."""
+        pass
+
+    @abstractmethod
+    def get_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        pass
+
+    @abstractmethod
+    def upsert_source(self, source_id: str, data: Dict[str, Any]) -> None:
+        pass
+
+    @abstractmethod
+    def get_sources(self) -> Dict[str, Dict[str, Any]]:
+        """Returns every source document keyed by source ID."""
+        pass
+
+    @abstractmethod
+    def query_articles(
+        self, filters: Dict[str, Any], limit: int, start_after: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns (article_id, data) pairs whose fields equal every filter.
+
+        Results are ordered by article ID; start_after resumes after that ID.
+        """
+        pass
+
+    @abstractmethod
+    def recent_article_ids(self, limit: int) -> List[str]:
+        pass
+
+    @abstractmethod
+    def recent_articles(
+        self, limit: int, fields: List[str]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        """Returns (article_id, data) pairs of the newest articles, newest first.
+
+        Only the given fields are read.
+        """
+        pass
+
+    def bulk_insert(self, articles: List[Dict[str, Any]]) -> WriteResult:
+        """Writes any number of articles concurrently with per-document retries.
+
+        Returns (saved_ids, failed_ids, retries).
+        """
+        with self._committer_lock:
+            if self._committer is None:
+                self._committer = ParallelBatchCommitter(self.insert_articles)
+        return self._committer.write(articles)
+
+    def _check_batch(self, writes):
+        if len(writes) > MAX_BATCH_SIZE:
+            raise ValueError(
+                f"Batch of {len(writes)} exceeds the limit of {MAX_BATCH_SIZE} writes."
+            )
+
+
+class FirestoreStorage(StorageBackend):
+
+    backend_name = "firestore"
+
+    def __init__(self, articles_collection: str, summary_collection: str):
+        super().__init__(articles_collection, summary_collection)
+        self.db = None
+        self._init_firebase()
+
+    def _init_firebase(self):
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+
+        if firebase_admin._apps:
+            self.db = firestore.client()
+            logging.info("Firebase already initialized. Using existing app.")
+            return
+
+        service_account_path = os.getenv("FIREBASE_SERVICE_ACCOUNT_PATH")
+        if not service_account_path:
+            raise ValueError(
+                "FIREBASE_SERVICE_ACCOUNT_PATH environment variable is required."
+            )
+
+        if not os.path.isabs(service_account_path):
+            service_account_path = os.path.join(
+                os.path.dirname(__file__), service_account_path
+            )
+
+        if not os.path.exists(service_account_path):
+            raise FileNotFoundError(
+                f"Service account file not found at resolved path: {service_account_path}"
+            )
+
+        try:
+            cred = credentials.Certificate(service_account_path)
+            firebase_admin.initialize_app(cred)
+            self.db = firestore.client()
+            logging.info("Firebase initialized successfully.")
+        except Exception as e:
+            logging.error(f"Failed to initialize Firebase: {e}", exc_info=True)
+            raise
+
+    def _article_ref(self, article_id: str):
+        return self.db.collection(self.articles_collection).document(article_id)
+
+    @instrumented("read")
+    def existing_ids(self, article_ids: List[str]) -> Set[str]:
+        if not article_ids:
+            return set()
+        docs = self.db.get_all([self._article_ref(id) for id in article_ids])
+        return {doc.id for doc in docs if doc.exists}
+
+    @instrumented("write")
+    def insert_articles(self, articles: List[Dict[str, Any]]) -> None:
+        self._check_batch(articles)
+        batch = self.db.batch()
+        for article in articles:
+            batch.set(self._article_ref(article["article_id"]), article)
+        batch.commit()
+
+    @instrumented("write")
+    def bulk_insert(self, articles: List[Dict[str, Any]]) -> WriteResult:
+        from google.cloud.firestore_v1.bulk_writer import (
+            BulkRetry,
+            BulkWriterOptions,
+        )
+
+        lock = threading.Lock()
+        saved_ids: List[str] = []
+        failed_ids: List[str] = []
+        retries = 0
+
+        def on_result(reference, result, bulk_writer):
+            with lock:
+                saved_ids.append(reference.id)
+
+        def on_error(failure, bulk_writer) -> bool:
+            nonlocal retries
+            with lock:
+                if failure.attempts + 1 < WRITE_MAX_ATTEMPTS:
+                    retries += 1
+                    return True
+                reference = getattr(failure.operation, "reference", None)
+                failed_ids.append(reference.id if reference else "unknown")
+                logging.warning(f"Giving up on write after retries: {failure.message}")
+                return False
+
+        bulk_writer = self.db.bulk_writer(
+            options=BulkWriterOptions(
+                initial_ops_per_second=WRITE_INITIAL_OPS_PER_SECOND,
+                max_ops_per_second=WRITE_MAX_OPS_PER_SECOND,
+                retry=BulkRetry.exponential,
+            )
+        )
+        bulk_writer.on_write_result(on_result)
+        bulk_writer.on_write_error(on_error)
+        for article in articles:
+            bulk_writer.set(self._article_ref(article["article_id"]), article)
+        bulk_writer.close()
+        return saved_ids, failed_ids, retries
+
+    def update_article(self, article_id: str, fields: Dict[str, Any]) -> None:
+        self._article_ref(article_id).update(fields)
+
+    @instrumented("update")
+    def update_articles(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        self._check_batch(updates)
+        batch = self.db.batch()
+        for article_id, fields in updates.items():
+            batch.update(self._article_ref(article_id), fields)
+        batch.commit()
+
+    def upsert_summary(
+        self, doc_id: str, data: Dict[str, Any], merge: bool = False
+    ) -> None:
+        document = self.db.collection(self.summary_collection).document(doc_id)
+        # Field paths replace those fields whole, as the other backends do.
+        document.set(data, merge=list(data) if merge else False)
+
+    def get_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        doc = self.db.collection(self.summary_collection).document(doc_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def upsert_source(self, source_id: str, data: Dict[str, Any]) -> None:
+        self.db.collection(self.sources_collection).document(source_id).set(data)
+
+    def get_sources(self) -> Dict[str, Dict[str, Any]]:
+        docs = self.db.collection(self.sources_collection).stream()
+        return {doc.id: doc.to_dict() for doc in docs}
+
+    @instrumented("query")
+    def query_articles(
+        self, filters: Dict[str, Any], limit: int, start_after: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        query = self.db.collection(self.articles_collection)
+        for field, value in filters.items():
+            query = query.where(field, "==", value)
+        query = query.order_by("__name__")
+        if start_after:
+            query = query.start_after({"__name__": start_after})
+        return [(doc.id, doc.to_dict()) for doc in query.limit(limit).stream()]
+
+    def recent_article_ids(self, limit: int) -> List[str]:
+        from firebase_admin import firestore
+
+        docs = (
+            self.db.collection(self.articles_collection)
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+            .select([])
+            .stream()
+        )
+        return [doc.id for doc in docs]
+
+    def recent_articles(
+        self, limit: int, fields: List[str]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        from firebase_admin import firestore
+
+        docs = (
+            self.db.collection(self.articles_collection)
+            .order_by("created_at", direction=firestore.Query.DESCENDING)
+            .limit(limit)
+            .select(fields)
+            .stream()
+        )
+        return [(doc.id, doc.to_dict()) for doc in docs]
+
+
+class MemoryStorage(StorageBackend):
+
+    backend_name = "memory"
+
+    def __init__(self, articles_collection: str, summary_collection: str):
+        super().__init__(articles_collection, summary_collection)
+        self._lock = threading.Lock()
+        self.articles: Dict[str, Dict[str, Any]] = {}
+        self.summaries: Dict[str, Dict[str, Any]] = {}
+        self.sources: Dict[str, Dict[str, Any]] = {}
+
+    @instrumented("read")
+    def existing_ids(self, article_ids: List[str]) -> Set[str]:
+        with self._lock:
+            return {id for id in article_ids if id in self.articles}
+
+    @instrumented("write")
+    def insert_articles(self, articles: List[Dict[str, Any]]) -> None:
+        self._check_batch(articles)
+        with self._lock:
+            for article in articles:
+                self.articles[article["article_id"]] = dict(article)
+
+    def update_article(self, article_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock:
+            if article_id not in self.articles:
+                raise KeyError(f"No article with ID '{article_id}'.")
+            self.articles[article_id].update(fields)
+
+    @instrumented("update")
+    def update_articles(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        self._check_batch(updates)
+        with self._lock:
+            missing = [id for id in updates if id not in self.articles]
+            if missing:
+                raise KeyError(f"No articles with IDs {missing}.")
+            for article_id, fields in updates.items():
+                self.articles[article_id].update(fields)
+
+    def upsert_summary(
+        self, doc_id: str, data: Dict[str, Any], merge: bool = False
+    ) -> None:
+        with self._lock:
+            if merge:
+                self.summaries.setdefault(doc_id, {}).update(data)
+            else:
+                self.summaries[doc_id] = dict(data)
+
+    def get_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            data = self.summaries.get(doc_id)
+        return dict(data) if data is not None else None
+
+    def upsert_source(self, source_id: str, data: Dict[str, Any]) -> None:
+        with self._lock:
+            self.sources[source_id] = dict(data)
+
+    def get_sources(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {id: dict(data) for id, data in self.sources.items()}
+
+    @instrumented("query")
+    def query_articles(
+        self, filters: Dict[str, Any], limit: int, start_after: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            matches = [
+                (id, dict(data))
+                for id, data in sorted(self.articles.items())
+                if (start_after is None or id > start_after)
+                and all(data.get(field) == value for field, value in filters.items())
+            ]
+        return matches[:limit]
+
+    def recent_article_ids(self, limit: int) -> List[str]:
+        with self._lock:
+            ordered = sorted(
+                self.articles.items(),
+                key=lambda item: item[1].get("created_at") or "",
+                reverse=True,
+            )
+        return [id for id, _ in ordered[:limit]]
+
+    def recent_articles(
+        self, limit: int, fields: List[str]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            ordered = sorted(
+                self.articles.items(),
+                key=lambda item: item[1].get("created_at") or "",
+                reverse=True,
+            )
+            return [
+                (id, {field: data[field] for field in fields if field in data})
+                for id, data in ordered[:limit]
+            ]
+
+
+class SQLiteStorage(StorageBackend):
+    """Single-file stand-in for Firestore; documents are stored as JSON."""
+
+    backend_name = "sqlite"
+
+    def __init__(self, articles_collection: str, summary_collection: str, path: str):
+        super().__init__(articles_collection, summary_collection)
+        self.path = path
+        self._lock = threading.Lock()
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        with self.conn:
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS articles ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+                "created_at TEXT, PRIMARY KEY (collection, id))"
+            )
+            self.conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "collection TEXT NOT NULL, id TEXT NOT NULL, data TEXT NOT NULL, "
+                "PRIMARY KEY (collection, id))"
+            )
+        logging.info(f"SQLite storage opened at {path}.")
+
+    @staticmethod
+    def _dumps(data: Dict[str, Any]) -> str:
+        return json.dumps(data, ensure_ascii=False, default=str)
+
+    @instrumented("read")
+    def existing_ids(self, article_ids: List[str]) -> Set[str]:
+        if not article_ids:
+            return set()
+        placeholders = ",".join("?" for _ in article_ids)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id FROM articles WHERE collection = ? AND id IN ({placeholders})",
+                [self.articles_collection, *article_ids],
+            ).fetchall()
+        return {row[0] for row in rows}
+
+    @instrumented("write")
+    def insert_articles(self, articles: List[Dict[str, Any]]) -> None:
+        self._check_batch(articles)
+        rows = [
+            (
+                self.articles_collection,
+                article["article_id"],
+                self._dumps(article),
+                article.get("created_at"),
+            )
+            for article in articles
+        ]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO articles (collection, id, data, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def update_article(self, article_id: str, fields: Dict[str, Any]) -> None:
+        with self._lock, self.conn:
+            row = self.conn.execute(
+                "SELECT data FROM articles WHERE collection = ? AND id = ?",
+                (self.articles_collection, article_id),
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"No article with ID '{article_id}'.")
+            data = json.loads(row[0])
+            data.update(fields)
+            self.conn.execute(
+                "UPDATE articles SET data = ? WHERE collection = ? AND id = ?",
+                (self._dumps(data), self.articles_collection, article_id),
+            )
+
+    @instrumented("update")
+    def update_articles(self, updates: Dict[str, Dict[str, Any]]) -> None:
+        self._check_batch(updates)
+        with self._lock, self.conn:
+            for article_id, fields in updates.items():
+                row = self.conn.execute(
+                    "SELECT data FROM articles WHERE collection = ? AND id = ?",
+                    (self.articles_collection, article_id),
+                ).fetchone()
+                if row is None:
+                    raise KeyError(f"No article with ID '{article_id}'.")
+                data = json.loads(row[0])
+                data.update(fields)
+                self.conn.execute(
+                    "UPDATE articles SET data = ? WHERE collection = ? AND id = ?",
+                    (self._dumps(data), self.articles_collection, article_id),
+                )
+
+    def upsert_summary(
+        self, doc_id: str, data: Dict[str, Any], merge: bool = False
+    ) -> None:
+        with self._lock, self.conn:
+            if merge:
+                row = self.conn.execute(
+                    "SELECT data FROM summaries WHERE collection = ? AND id = ?",
+                    (self.summary_collection, doc_id),
+                ).fetchone()
+                data = {**(json.loads(row[0]) if row else {}), **data}
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries (collection, id, data) VALUES (?, ?, ?)",
+                (self.summary_collection, doc_id, self._dumps(data)),
+            )
+
+    def get_summary(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT data FROM summaries WHERE collection = ? AND id = ?",
+                (self.summary_collection, doc_id),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def upsert_source(self, source_id: str, data: Dict[str, Any]) -> None:
+        # Sources share the summaries table under their own collection name.
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO summaries (collection, id, data) VALUES (?, ?, ?)",
+                (self.sources_collection, source_id, self._dumps(data)),
+            )
+
+    def get_sources(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, data FROM summaries WHERE collection = ?",
+                (self.sources_collection,),
+            ).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    @instrumented("query")
+    def query_articles(
+        self, filters: Dict[str, Any], limit: int, start_after: Optional[str] = None
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        clauses = ["collection = ?"]
+        params: List[Any] = [self.articles_collection]
+        for field, value in filters.items():
+            clauses.append("json_extract(data, ?) = ?")
+            params.extend([f"$.{field}", value])
+        if start_after:
+            clauses.append("id > ?")
+            params.append(start_after)
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(
+                f"SELECT id, data FROM articles WHERE {' AND '.join(clauses)} "
+                "ORDER BY id LIMIT ?",
+                params,
+            ).fetchall()
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def recent_article_ids(self, limit: int) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id FROM articles WHERE collection = ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (self.articles_collection, limit),
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def recent_articles(
+        self, limit: int, fields: List[str]
+    ) -> List[Tuple[str, Dict[str, Any]]]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT id, data FROM articles WHERE collection = ? "
+                "ORDER BY created_at DESC LIMIT ?",
+                (self.articles_collection, limit),
+            ).fetchall()
+        results = []
+        for article_id, data in rows:
+            data = json.loads(data)
+            results.append(
+                (article_id, {field: data[field] for field in fields if field in data})
+            )
+        return results
+
+
+_backends: Dict[Tuple[str, str, str], StorageBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def create_storage(
+    articles_collection: str, summary_collection: str, backend: Optional[str] = None
+) -> StorageBackend:
+    """Returns the backend selected by STORAGE_BACKEND (firestore, memory, sqlite).
+
+    Instances are shared per process so that all fetchers see the same
+    in-memory or SQLite data.
+    """
+    backend = (backend or os.getenv("STORAGE_BACKEND", "firestore")).lower()
+    key = (backend, articles_collection, summary_collection)
+    with _backends_lock:
+        if key in _backends:
+            return _backends[key]
+
+        if backend == "firestore":
+            storage = FirestoreStorage(articles_collection, summary_collection)
+        elif backend == "memory":
+            storage = MemoryStorage(articles_collection, summary_collection)
+        elif backend == "sqlite":
+            storage = SQLiteStorage(
+                articles_collection,
+                summary_collection,
+                os.getenv("SQLITE_PATH", DEFAULT_SQLITE_PATH),
+            )
+        else:
+            raise ValueError(f"Unknown STORAGE_BACKEND '{backend}'.")
+
+        logging.info(f"Using '{backend}' storage backend.")
+        _backends[key] = storage
+        return storage
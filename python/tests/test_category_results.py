@@ -0,0 +1,107 @@
+"""Per-category poll results and the summary written by a partial poll.
+
+Run from the python/ directory:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.update(
+    STORAGE_BACKEND="memory",
+    SEEN_CACHE_ENABLED="false",
+    NEAR_DUP_MODE="off",
+    RSS_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "rss_cache.json"),
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from rss_fetcher import RSSFetcher  # noqa: E402
+from selenium_fetcher import SeleniumFetcher  # noqa: E402
+from storage import MemoryStorage  # noqa: E402
+
+RSS_ITEM = """<item><title>{title}</title><link>https://vnexpress.net/{slug}.html</link>
+<description>{title} summary</description><pubDate>{published}</pubDate></item>"""
+
+
+class NewArticlesTest(unittest.TestCase):
+    """`new` counts listed articles that were not already stored, in every fetcher."""
+
+    def test_dantri_leaves_out_stored_articles(self):
+        fetcher = SeleniumFetcher()
+        fetcher.storage = MemoryStorage("articles", "news_data")
+        fetcher.fetch_mode = "http"
+        articles = [
+            fetcher._create_article_dict(
+                f"Title {i}", f"/xa-hoi/bai-{i}.htm", "", None, "society"
+            )
+            for i in range(20)
+        ]
+        fetcher.storage.insert_articles(articles[:5])
+        fetcher.fetch_category_articles_http = lambda slug, name: [
+            dict(article) for article in articles
+        ]
+        fetcher.run(["xa-hoi"])
+        self.assertEqual(fetcher.category_results["xa-hoi"]["new"], 15)
+
+    def test_rss_leaves_out_stored_articles(self):
+        fetcher = RSSFetcher()
+        fetcher.storage = MemoryStorage("articles", "news_data")
+        fetcher.feed_cache.enabled = False
+        items = [
+            ("Stored", "stored", "Sun, 22 Jun 2025 08:00:00 +0700"),
+            ("Older new", "older-new", "Sun, 22 Jun 2025 09:00:00 +0700"),
+            ("Newest", "newest", "Sun, 22 Jun 2025 14:00:00 +0700"),
+        ]
+        feed = "<rss><channel>{}</channel></rss>".format(
+            "".join(
+                RSS_ITEM.format(title=title, slug=slug, published=published)
+                for title, slug, published in items
+            )
+        )
+        stored_id = fetcher._generate_article_id("https://vnexpress.net/stored.html")
+        fetcher.storage.insert_articles([{"article_id": stored_id, "title": "Stored"}])
+        response = mock.Mock(status_code=200, content=feed.encode(), headers={})
+        with mock.patch.object(fetcher.session, "get", return_value=response):
+            fetcher.run(["thoi-su"])
+        result = fetcher.category_results["thoi-su"]
+        self.assertEqual(result["new"], 2)
+        self.assertEqual(result["oldest"].hour, 9)
+        self.assertEqual(result["newest"].hour, 14)
+
+
+class PartialRunSummaryTest(unittest.TestCase):
+    def test_partial_run_keeps_the_full_run_totals(self):
+        fetcher = SeleniumFetcher()
+        fetcher.storage = MemoryStorage("articles", "news_data")
+        fetcher.fetch_mode = "http"
+        fetcher.fetch_category_articles_http = lambda slug, name: [
+            fetcher._create_article_dict(
+                f"{slug} {i}", f"/{slug}/bai-{i}.htm", "", None, name
+            )
+            for i in range(3)
+        ]
+        summary_id = f"summary_{fetcher.source_id}"
+
+        fetcher.run()
+        categories = len(fetcher.category_keys())
+        summary = fetcher.storage.summaries[summary_id]
+        self.assertEqual(summary["total_articles_saved"], 3 * categories)
+        self.assertEqual(len(summary["categories_processed"]), categories)
+
+        fetcher.storage.articles.clear()
+        fetcher.watermarks.load({})
+        with mock.patch.object(fetcher, "_load_watermarks"):
+            fetcher.run(["xa-hoi"])
+        summary = fetcher.storage.summaries[summary_id]
+        self.assertEqual(summary["total_articles_saved"], 3 * categories)
+        self.assertEqual(len(summary["categories_processed"]), categories)
+        self.assertEqual(summary["last_poll"]["total_articles_saved"], 3)
+        self.assertEqual(summary["last_poll"]["categories_processed"], ["society"])
+
+
+if __name__ == "__main__":
+    unittest.main()
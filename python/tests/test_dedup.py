@@ -0,0 +1,55 @@
+"""Near-duplicate story IDs must survive a restart of the process.
+
+Run from the python/ directory:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dedup import NearDuplicateIndex  # noqa: E402
+
+STORY = (
+    "Giá vàng miếng tăng lên 120 triệu đồng mỗi lượng",
+    "Theo cơ quan chức năng, diễn biến này xuất hiện từ sáng nay và dự kiến "
+    "kéo dài trong nhiều ngày tới tại các cửa hàng ở Hà Nội",
+)
+
+
+def article(article_id, title, description, **fields):
+    return {
+        "article_id": article_id,
+        "title": title,
+        "description": description,
+        **fields,
+    }
+
+
+class WarmIndexTest(unittest.TestCase):
+    def test_copy_after_restart_joins_the_stored_story(self):
+        before = NearDuplicateIndex()
+        first = article("vnexpress-1", *STORY)
+        second = article("dantri-1", STORY[0], STORY[1] + " theo giá niêm yết")
+        self.assertEqual(before.assign(first), "vnexpress-1")
+        self.assertEqual(before.assign(second), "vnexpress-1")
+
+        restarted = NearDuplicateIndex()
+        stored = [
+            ("vnexpress-1", dict(first, story_id="vnexpress-1")),
+            ("dantri-1", dict(second, story_id="vnexpress-1")),
+        ]
+        self.assertEqual(restarted.warm(stored), 2)
+        third = article(
+            "newsdata-1", "Giá vàng miếng tăng lên 120 triệu đồng", STORY[1]
+        )
+        self.assertEqual(restarted.assign(third), "vnexpress-1")
+        # A warm index is never warmed twice.
+        self.assertEqual(restarted.warm(stored), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""A run whose writes fail must not move the watermark past unsaved articles.
+
+Run from the python/ directory:
+
+    python -m unittest discover tests
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+os.environ.update(
+    STORAGE_BACKEND="memory",
+    SEEN_CACHE_ENABLED="false",
+    NEAR_DUP_MODE="off",
+    RSS_CACHE_PATH=os.path.join(tempfile.mkdtemp(), "rss_cache.json"),
+)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import base_fetcher  # noqa: E402
+from rss_fetcher import RSSFetcher  # noqa: E402
+from selenium_fetcher import SeleniumFetcher  # noqa: E402
+from storage import MemoryStorage  # noqa: E402
+from watermark import WatermarkTracker  # noqa: E402
+
+SLUG = "xa-hoi"
+
+
+class FailedWriteWatermarkTest(unittest.TestCase):
+    def _fetcher(self) -> SeleniumFetcher:
+        fetcher = SeleniumFetcher()
+        # create_storage() shares one backend per process; start empty.
+        fetcher.storage = MemoryStorage("articles", "news_data")
+        fetcher.fetch_mode = "http"
+        articles = [
+            (f"Title {i}", f"/xa-hoi/bai-{i}.htm", f"Excerpt {i}", None)
+            for i in range(20)
+        ]
+        fetcher.fetch_category_articles_http = lambda slug, name: [
+            fetcher._create_article_dict(*article, name) for article in articles
+        ]
+        return fetcher
+
+    def _watermark_ids(self, fetcher: SeleniumFetcher):
+        summary = fetcher.storage.summaries.get(f"summary_{fetcher.source_id}", {})
+        return summary.get("watermarks", {}).get(SLUG, {}).get("recent_ids", [])
+
+    def test_failed_write_keeps_articles_for_the_next_run(self):
+        for engine in ("batch", "bulk"):
+            with self.subTest(engine=engine), mock.patch.object(
+                base_fetcher, "WRITE_ENGINE", engine
+            ), mock.patch("write_engine.time.sleep"):
+                fetcher = self._fetcher()
+                insert_articles = fetcher.storage.insert_articles
+                failing = True
+
+                # The bulk committer keeps the insert function it first sees.
+                def flaky_insert(articles):
+                    if failing:
+                        raise RuntimeError("storage unavailable")
+                    insert_articles(articles)
+
+                fetcher.storage.insert_articles = flaky_insert
+                fetcher.run([SLUG])
+                self.assertEqual(len(fetcher.storage.articles), 0)
+                self.assertEqual(self._watermark_ids(fetcher), [])
+
+                failing = False
+                fetcher.run([SLUG])
+                self.assertEqual(len(fetcher.storage.articles), 20)
+                self.assertEqual(len(self._watermark_ids(fetcher)), 20)
+
+    def test_failed_watermark_read_keeps_stored_watermarks(self):
+        fetcher = self._fetcher()
+        stored = {"the-thao": {"published": None, "recent_ids": ["old-id"]}}
+        fetcher.storage.upsert_summary(
+            f"summary_{fetcher.source_id}", {"watermarks": stored}
+        )
+        with mock.patch.object(
+            fetcher.storage, "get_summary", side_effect=RuntimeError("timeout")
+        ):
+            fetcher.run([SLUG])
+        self.assertEqual(len(fetcher.storage.articles), 20)
+        summary = fetcher.storage.summaries[f"summary_{fetcher.source_id}"]
+        self.assertEqual(summary["watermarks"], stored)
+
+
+class WatermarkTrackerTest(unittest.TestCase):
+    def test_recent_ids_are_capped(self):
+        for max_ids, kept in ((2, ["b", "c"]), (0, [])):
+            tracker = WatermarkTracker(max_ids=max_ids)
+            for article_id in ("a", "b", "c"):
+                tracker.observe(SLUG, article_id, None)
+            tracker.commit()
+            self.assertEqual(tracker.to_dict()[SLUG]["recent_ids"], kept)
+
+
+RSS_ITEM = """<item><title>{title}</title><link>https://vnexpress.net/{slug}.html</link>
+<description>{title} summary</description><pubDate>{published}</pubDate></item>"""
+
+
+class PopularityOrderedFeedTest(unittest.TestCase):
+    def test_newer_items_after_an_old_one_are_kept(self):
+        fetcher = RSSFetcher()
+        fetcher.watermarks.load(
+            {"tin-xem-nhieu": {"published": "2025-06-22T12:00:00+07:00"}}
+        )
+        items = [
+            ("Popular new", "popular-new", "Sun, 22 Jun 2025 13:00:00 +0700"),
+            ("Popular old", "popular-old", "Sun, 22 Jun 2025 08:00:00 +0700"),
+            ("Newest", "newest", "Sun, 22 Jun 2025 14:00:00 +0700"),
+        ]
+        feed = "<rss><channel>{}</channel></rss>".format(
+            "".join(
+                RSS_ITEM.format(title=title, slug=slug, published=published)
+                for title, slug, published in items
+            )
+        )
+        response = mock.Mock(status_code=200, content=feed.encode(), headers={})
+        with mock.patch.object(fetcher.session, "get", return_value=response):
+            articles = fetcher.fetch_rss_category("tin-xem-nhieu", "most-viewed")
+        self.assertEqual(
+            [article["title"] for article in articles], ["Popular new", "Newest"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
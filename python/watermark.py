@@ -0,0 +1,116 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+WATERMARK_ENABLED = os.getenv("WATERMARK_ENABLED", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+# IDs remembered per category, for sources without usable publication dates
+# and for items that share the watermark's timestamp.
+WATERMARK_RECENT_IDS = int(os.getenv("WATERMARK_RECENT_IDS", "100"))
+# Items up to this much older than the watermark are still looked at, in
+# case a feed publishes slightly out of order.
+WATERMARK_GRACE_MINUTES = float(os.getenv("WATERMARK_GRACE_MINUTES", "30"))
+
+
+class WatermarkTracker:
+    """Per-category high-water marks: newest publication time plus recent IDs.
+
+    Marks are stored in the source's summary document as
+    {key: {"published": iso-8601, "recent_ids": [...]}}. observe() only stages
+    an item; commit() makes it effective once the run's articles were stored,
+    so a failed save never causes the next run to skip them.
+    """
+
+    def __init__(
+        self,
+        data: Optional[Dict[str, Any]] = None,
+        enabled: bool = WATERMARK_ENABLED,
+        max_ids: int = WATERMARK_RECENT_IDS,
+        grace_minutes: float = WATERMARK_GRACE_MINUTES,
+    ):
+        self.enabled = enabled
+        self.max_ids = max_ids
+        self.grace = timedelta(minutes=grace_minutes)
+        self._lock = threading.Lock()
+        self._published: Dict[str, datetime] = {}
+        self._recent_ids: Dict[str, List[str]] = {}
+        self._pending: Dict[str, List[Any]] = {}
+        self.load(data or {})
+
+    def load(self, data: Dict[str, Any]):
+        with self._lock:
+            self._published.clear()
+            self._recent_ids.clear()
+            self._pending.clear()
+            for key, mark in data.items():
+                if mark.get("published"):
+                    try:
+                        self._published[key] = datetime.fromisoformat(mark["published"])
+                    except (TypeError, ValueError):
+                        pass
+                self._recent_ids[key] = list(mark.get("recent_ids") or [])
+
+    def is_older(self, key: str, published: Optional[datetime]) -> bool:
+        """True if `published` is older than the key's watermark (minus grace)."""
+        if not self.enabled or published is None:
+            return False
+        with self._lock:
+            mark = self._published.get(key)
+        if mark is None or (mark.tzinfo is None) != (published.tzinfo is None):
+            return False
+        return published < mark - self.grace
+
+    def seen(self, key: str, article_id: str) -> bool:
+        if not self.enabled:
+            return False
+        with self._lock:
+            return article_id in self._recent_ids.get(key, ())
+
+    def observe(self, key: str, article_id: str, published: Optional[datetime]):
+        with self._lock:
+            self._pending.setdefault(key, []).append((article_id, published))
+
+    def commit(self):
+        with self._lock:
+            for key, items in self._pending.items():
+                ids = self._recent_ids.setdefault(key, [])
+                for article_id, published in items:
+                    if article_id not in ids:
+                        ids.append(article_id)
+                    mark = self._published.get(key)
+                    if published is not None and (
+                        mark is None
+                        or (
+                            (mark.tzinfo is None) == (published.tzinfo is None)
+                            and published > mark
+                        )
+                    ):
+                        self._published[key] = published
+                # del ids[:-0] deletes nothing, so a limit of 0 clears instead.
+                if self.max_ids > 0:
+                    del ids[: -self.max_ids]
+                else:
+                    ids.clear()
+            self._pending.clear()
+
+    def discard(self):
+        with self._lock:
+            self._pending.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                key: {
+                    "published": (
+                        self._published[key].isoformat()
+                        if key in self._published
+                        else None
+                    ),
+                    "recent_ids": list(ids),
+                }
+                for key, ids in self._recent_ids.items()
+            }
@@ -0,0 +1,140 @@
+import os
+import time
+import random
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Tuple
+
+from rate_limit import TokenBucket
+
+# "batch" commits one WriteBatch per flush (the original behaviour); "bulk"
+# uses Firestore's BulkWriter, or ParallelBatchCommitter on other backends.
+WRITE_ENGINE = os.getenv("WRITE_ENGINE", "batch")
+WRITE_CONCURRENCY = int(os.getenv("WRITE_CONCURRENCY", "4"))
+WRITE_MAX_ATTEMPTS = int(os.getenv("WRITE_MAX_ATTEMPTS", "5"))
+WRITE_INITIAL_OPS_PER_SECOND = int(os.getenv("WRITE_INITIAL_OPS_PER_SECOND", "500"))
+WRITE_MAX_OPS_PER_SECOND = int(os.getenv("WRITE_MAX_OPS_PER_SECOND", "10000"))
+WRITE_CHUNK_SIZE = 50
+
+# Firestore's "500/50/5" guidance: start at 500 ops/s, add 50% every 5 minutes.
+RAMP_UP_FACTOR = 1.5
+RAMP_UP_INTERVAL_SECONDS = 300
+
+WriteResult = Tuple[List[str], List[str], int]
+
+
+class WriteStats:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.written = 0
+        self.failed = 0
+        self.retries = 0
+        self.seconds = 0.0
+
+    def record(self, written: int, failed: int, retries: int, seconds: float):
+        with self._lock:
+            self.written += written
+            self.failed += failed
+            self.retries += retries
+            self.seconds += seconds
+
+    @property
+    def docs_per_second(self) -> float:
+        return self.written / self.seconds if self.seconds else 0.0
+
+    def log(self, label: str):
+        logging.info(
+            f"Write stats for {label}: {self.written} docs in {self.seconds:.2f}s "
+            f"({self.docs_per_second:.1f} docs/s), {self.failed} failed, "
+            f"{self.retries} retries."
+        )
+
+
+class RampingRateLimiter:
+    """Token bucket whose rate grows by RAMP_UP_FACTOR every interval."""
+
+    def __init__(self, initial_rate: float, max_rate: float):
+        self.max_rate = max_rate
+        self._bucket = TokenBucket(initial_rate)
+        self._next_ramp = time.monotonic() + RAMP_UP_INTERVAL_SECONDS
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens: int):
+        with self._lock:
+            now = time.monotonic()
+            if now >= self._next_ramp and self._bucket.rate < self.max_rate:
+                rate = min(self.max_rate, self._bucket.rate * RAMP_UP_FACTOR)
+                self._bucket.set_rate(rate, capacity=rate)
+                self._next_ramp = now + RAMP_UP_INTERVAL_SECONDS
+                logging.info(f"Write rate ramped up to {rate:.0f} ops/s.")
+        self._bucket.acquire(tokens)
+
+
+class ParallelBatchCommitter:
+    """Commits small batches concurrently and retries failed documents one by one.
+
+    A chunk that fails to commit is split up and each of its documents is
+    retried on its own with exponential backoff, so one bad document or a
+    transient error no longer drops the whole batch.
+    """
+
+    def __init__(
+        self,
+        insert_fn: Callable[[List[Dict[str, Any]]], None],
+        concurrency: int = WRITE_CONCURRENCY,
+        max_attempts: int = WRITE_MAX_ATTEMPTS,
+        initial_ops_per_second: int = WRITE_INITIAL_OPS_PER_SECOND,
+        max_ops_per_second: int = WRITE_MAX_OPS_PER_SECOND,
+        chunk_size: int = WRITE_CHUNK_SIZE,
+    ):
+        self.insert_fn = insert_fn
+        self.max_attempts = max(1, max_attempts)
+        self.chunk_size = chunk_size
+        self.limiter = RampingRateLimiter(initial_ops_per_second, max_ops_per_second)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, concurrency), thread_name_prefix="write"
+        )
+
+    def write(self, articles: List[Dict[str, Any]]) -> WriteResult:
+        chunks = [
+            articles[i : i + self.chunk_size]
+            for i in range(0, len(articles), self.chunk_size)
+        ]
+        saved_ids, failed_ids, retries = [], [], 0
+        for chunk_saved, chunk_failed, chunk_retries in self._executor.map(
+            self._commit_chunk, chunks
+        ):
+            saved_ids.extend(chunk_saved)
+            failed_ids.extend(chunk_failed)
+            retries += chunk_retries
+        return saved_ids, failed_ids, retries
+
+    def _commit_chunk(self, chunk: List[Dict[str, Any]]) -> WriteResult:
+        self.limiter.acquire(len(chunk))
+        try:
+            self.insert_fn(chunk)
+            return [article["article_id"] for article in chunk], [], 0
+        except Exception as e:
+            logging.warning(
+                f"Commit of {len(chunk)} documents failed, retrying individually: {e}"
+            )
+
+        saved_ids, failed_ids, retries = [], [], 0
+        for article in chunk:
+            for attempt in range(1, self.max_attempts):
+                retries += 1
+                time.sleep(min(30.0, 0.5 * 2 ** (attempt - 1)) + random.random() * 0.1)
+                self.limiter.acquire(1)
+                try:
+                    self.insert_fn([article])
+                    saved_ids.append(article["article_id"])
+                    break
+                except Exception as e:
+                    logging.warning(
+                        f"Attempt {attempt + 1} for article {article['article_id']} failed: {e}"
+                    )
+            else:
+                failed_ids.append(article["article_id"])
+        return saved_ids, failed_ids, retries